@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.admin import admin, auth, department, job_group, user
+from api.admin import admin, auth, department, experience, job_group, quest, user
 
 api_v1_router = APIRouter(prefix="/api/v1")
 
@@ -9,5 +9,7 @@ api_v1_router.include_router(user.router, tags=["admin/user"], prefix="/admin/us
 api_v1_router.include_router(auth.router, tags=["admin/auth"], prefix="/admin/auth")
 api_v1_router.include_router(job_group.router, tags=["admin/job_group"], prefix="/admin")
 api_v1_router.include_router(department.router, tags=["admin/department"], prefix="/admin")
+api_v1_router.include_router(experience.router, tags=["admin/experience"], prefix="/admin/experience")
+api_v1_router.include_router(quest.router, tags=["admin/quest"], prefix="/admin")
 
 
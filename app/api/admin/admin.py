@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
@@ -20,11 +21,11 @@ router = APIRouter()
 @router.post("", response_model=admin_schema.AdminJwtToken, status_code=status.HTTP_201_CREATED)
 async def create_admin(
     data: admin_schema.AdminCreate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Check if the user already exists
-        db_admin = db.query(admin_model.Admin).filter(admin_model.Admin.username == data.username).first()
+        db_admin = await db.scalar(select(admin_model.Admin).where(admin_model.Admin.username == data.username))
         if db_admin:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -32,7 +33,7 @@ async def create_admin(
             )
         
         # Add user to the database
-        hashed_password = hash.hash_text(data.password)
+        hashed_password = await hash.hash_text_async(data.password)
 
         db_admin = admin_model.Admin(
             username=data.username,
@@ -41,8 +42,8 @@ async def create_admin(
         )
         
         db.add(db_admin)
-        db.commit()
-        db.refresh(db_admin)
+        await db.commit()
+        await db.refresh(db_admin)
         
         if not db_admin:
             raise HTTPException(
@@ -51,31 +52,18 @@ async def create_admin(
             )
         
         # Create JWT token
-        access_token = jwt.create_access_token("access", db_admin.id, jwt.Permission.ADMIN)
+        access_token = await jwt.issue_access_token(db, "admin", db_admin.id, jwt.Permission.ADMIN)
         refresh_token = jwt.create_refresh_token("refresh", db_admin.id, jwt.Permission.ADMIN)
 
         # Add JWT token to the database
-        db_admin_jwt = admin_model.AdminJwtToken(
-            admin_id=db_admin.id,
-            access_token=access_token,
-            refresh_token=refresh_token
-        )
-        
-        db.add(db_admin_jwt)
-        db.commit()
-        db.refresh(db_admin_jwt)
-        
-        if not db_admin_jwt:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to create admin jwt"
-            )
+        await jwt.store_tokens(db, "admin", db_admin.id, access_token, refresh_token)
+        await db.commit()
         
         # Return JWT token(access, refresh)
         return admin_schema.AdminJwtToken(access_token=access_token, refresh_token=refresh_token)
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -92,7 +80,28 @@ async def create_admin(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
+
+@router.get("/metrics/hash", status_code=status.HTTP_200_OK)
+async def get_hash_metrics(
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
+        # Return hash pool queue depth and latency of this worker
+        return hash.pool.stats()
 
+    except Exception as e:
+        print(traceback.format_exc())
 
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        await db.close()
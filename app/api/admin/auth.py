@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
@@ -19,48 +20,31 @@ router = APIRouter()
 @router.post("/login", response_model=admin_schema.AdminJwtToken, status_code=status.HTTP_200_OK)
 async def login_admin(
     data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Check if the username is valid
-        db_admin = db.query(admin_model.Admin).filter(admin_model.Admin.username == data.username).first()
+        db_admin = await db.scalar(select(admin_model.Admin).where(admin_model.Admin.username == data.username))
         if not db_admin:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
 
         # Check if the password is valid
-        if not hash.verify_hashed_text(data.password, db_admin.hashed_password):
+        if not await hash.verify_hashed_text_async(data.password, db_admin.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
         
         # Create JWT token
-        access_token = jwt.create_access_token("access", db_admin.id, jwt.Permission.ADMIN)
+        access_token = await jwt.issue_access_token(db, "admin", db_admin.id, jwt.Permission.ADMIN)
         refresh_token = jwt.create_refresh_token("refresh", db_admin.id, jwt.Permission.ADMIN)
         
-        # Sync JWT token with the database
-        db_admin_jwt = db.query(admin_model.AdminJwtToken).filter(admin_model.AdminJwtToken.admin_id == db_admin.id).first()
-        if db_admin_jwt:
-            # Update JWT token in the database
-            db_admin_jwt.access_token = access_token
-            db_admin_jwt.refresh_token = refresh_token
-            
-            db.commit()
-            db.refresh(db_admin_jwt)
-        else:
-            # Add JWT token to the database
-            db_admin_jwt = admin_model.AdminJwtToken(
-                admin_id=db_admin.id,
-                access_token=access_token,
-                refresh_token=refresh_token
-            )
-            
-            db.add(db_admin_jwt)
-            db.commit()
-            db.refresh(db_admin_jwt)
+        # Sync JWT token with the database (the old tokens are no longer valid)
+        await jwt.store_tokens(db, "admin", db_admin.id, access_token, refresh_token)
+        await db.commit()
         
         # Return JWT token
         return admin_schema.AdminJwtToken(access_token=access_token, refresh_token=refresh_token)
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
 
         # Check the exception type
@@ -77,7 +61,7 @@ async def login_admin(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 
 
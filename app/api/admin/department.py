@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
@@ -11,6 +12,7 @@ from db.schemas import admin_schema, user_schema
 from db.models import admin_model, user_model
 
 from utils import utils, jwt, hash
+from utils.versions import versions, etag, not_modified
 from typing import Optional, List
 
 import traceback
@@ -21,13 +23,13 @@ router = APIRouter()
 async def create_departments(
     data: user_schema.DepartmentCreate, 
     access_token: str = Depends(admin_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
         # Check if the user already exist
-        db_department = db.query(user_model.Department).filter(user_model.Department.name == data.name).first()
+        db_department = await db.scalar(select(user_model.Department).where(user_model.Department.name == data.name))
         if db_department:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -40,8 +42,9 @@ async def create_departments(
         )
         
         db.add(db_department)
-        db.commit()
-        db.refresh(db_department)
+        await versions.bump(db, "departments")
+        await db.commit()
+        await db.refresh(db_department)
 
         if not db_department:
             raise HTTPException(
@@ -53,7 +56,7 @@ async def create_departments(
         return {"detail": "Department created successfully"}
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -70,17 +73,24 @@ async def create_departments(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 @router.get("/departments", status_code=status.HTTP_200_OK)
 async def get_departments_all(
+    request: Request,
+    response: Response,
     access_token: str = Depends(admin_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
-        db_departments = db.query(user_model.Department).all()
+        # Answer from the version counter when the client is up to date
+        cached = not_modified(request, response, etag("departments", versions.get("departments")))
+        if cached:
+            return cached
+
+        db_departments = (await db.execute(select(user_model.Department))).scalars().all()
         if not db_departments:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -97,6 +107,6 @@ async def get_departments_all(
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
 
 
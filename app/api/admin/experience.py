@@ -1,22 +1,224 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from core.security import user_oauth2_scheme, admin_oauth2_scheme
 
 from db.session import get_db
-from db.schemas import user_schema
-from db.models import user_model
+from db.schemas import user_schema, experience_schema
+from db.models import user_model, experience_model
 
-from utils import utils, jwt, hash
+from utils import utils, jwt, hash, level, experience
+from utils.versions import versions
 
 import traceback
 
 router = APIRouter()
 
+@router.post("/level", status_code=status.HTTP_201_CREATED)
+async def create_level(
+    data: experience_schema.LevelCreate,
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
+        # Check if the level already exists
+        db_level = await db.scalar(select(experience_model.Level).where(experience_model.Level.name == data.name))
+        if db_level:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The level with this name already exists in the system"
+            )
 
+        if data.total_required_experience < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The total required experience must be 0 or greater"
+            )
 
+        # Add level to the database
+        db_level = experience_model.Level(
+            name=data.name,
+            total_required_experience=data.total_required_experience
+        )
+
+        db.add(db_level)
+        await versions.bump(db, "levels")
+        await db.commit()
+        await db.refresh(db_level)
+
+        # Levels changed, drop the cached ladder
+        level.invalidate_ladder()
+
+        # Return success message
+        return {"detail": "Level created successfully"}
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+@router.put("/level/{level_id}", status_code=status.HTTP_200_OK)
+async def update_level(
+    level_id: int,
+    data: experience_schema.LevelUpdate,
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        db_level = await db.scalar(select(experience_model.Level).where(experience_model.Level.id == level_id))
+        if not db_level:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Level not found"
+            )
+
+        if data.total_required_experience is not None and data.total_required_experience < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The total required experience must be 0 or greater"
+            )
+
+        # Update level
+        if data.name is not None:
+            db_level.name = data.name
+        if data.total_required_experience is not None:
+            db_level.total_required_experience = data.total_required_experience
+
+        await versions.bump(db, "levels")
+        await db.commit()
+
+        # Levels changed, drop the cached ladder
+        level.invalidate_ladder()
+
+        # Return success message
+        return {"detail": "Level updated successfully"}
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 레벨 기준 변경 후 전체 사용자 레벨 재계산
+@router.post("/levels/recompute", response_model=experience_schema.LevelRecompute, status_code=status.HTTP_200_OK)
+async def recompute_levels(
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+        await db.close()
+
+        # Runs in a worker thread with its own session, so requests keep being served
+        summary = await level.recompute_levels_in_background()
+        if summary is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A level recomputation is already running"
+            )
+
+        return summary
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 사원 또는 부서의 기간별 경험치 조회
+@router.get("/timeseries", response_model=experience_schema.ExperienceTimeseries, status_code=status.HTTP_200_OK)
+async def get_timeseries(
+    scope_id: int = Query(...),  # 사원의 id 또는 부서의 id
+    scope: str = Query("department", pattern="^(user|department)$"),
+    granularity: str = Query("week", pattern="^(day|week|month)$"),
+    start: Optional[datetime] = Query(None),  # 기본값: granularity에 따라 30일, 52주, 12개월 전
+    end: Optional[datetime] = Query(None),  # 기본값: 현재 시각
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        start, end = experience.timeseries_range(granularity, start, end)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The start must be earlier than the end"
+            )
+
+        return experience_schema.ExperienceTimeseries(
+            granularity=granularity,
+            start=start,
+            end=end,
+            data=await experience.get_timeseries(db, scope, scope_id, granularity, start, end)
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from core.security import user_oauth2_scheme, admin_oauth2_scheme
@@ -10,6 +11,7 @@ from db.schemas import admin_schema, user_schema
 from db.models import admin_model, user_model
 
 from utils import utils, jwt, hash
+from utils.versions import versions, etag, not_modified
 
 import traceback
 
@@ -19,13 +21,13 @@ router = APIRouter()
 async def create_job_groups(
     data: user_schema.JobGroupCreate, 
     access_token: str = Depends(admin_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
         # Check if the job group already exist
-        db_job_group = db.query(user_model.JobGroup).filter(user_model.JobGroup.name == data.name).first()
+        db_job_group = await db.scalar(select(user_model.JobGroup).where(user_model.JobGroup.name == data.name))
         if db_job_group:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -38,8 +40,9 @@ async def create_job_groups(
         )
         
         db.add(db_job_group)
-        db.commit()
-        db.refresh(db_job_group)
+        await versions.bump(db, "job_groups")
+        await db.commit()
+        await db.refresh(db_job_group)
 
         if not db_job_group:
             raise HTTPException(
@@ -51,7 +54,7 @@ async def create_job_groups(
         return {"detail": "Job group created successfully"}
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -68,18 +71,25 @@ async def create_job_groups(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 @router.get("/job_groups", status_code=status.HTTP_200_OK)
 async def get_job_groups_all(
+    request: Request,
+    response: Response,
     access_token: str = Depends(admin_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        # Answer from the version counter when the client is up to date
+        cached = not_modified(request, response, etag("job_groups", versions.get("job_groups")))
+        if cached:
+            return cached
 
         # Get job groups from the database
-        db_job_groups = db.query(user_model.JobGroup).all()
+        db_job_groups = (await db.execute(select(user_model.JobGroup))).scalars().all()
         if not db_job_groups:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -96,6 +106,6 @@ async def get_job_groups_all(
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
 
 
@@ -0,0 +1,195 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List
+
+from core.security import admin_oauth2_scheme
+
+from db.session import get_db
+from db.schemas import quest_schema
+from db.models import user_model, quest_model
+
+from utils import jwt, experience, quests
+from utils.versions import versions
+
+import traceback
+
+router = APIRouter()
+
+@router.post("/quest", response_model=quest_schema.Quest, status_code=status.HTTP_201_CREATED)
+async def create_quest(
+    data: quest_schema.QuestCreate,
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        if data.condition not in quests.CONDITIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The condition must be one of {', '.join(quests.CONDITIONS)}"
+            )
+
+        if data.granted_by is not None and data.granted_by not in quests.GRANTED_BY:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The granted_by must be one of {', '.join(quests.GRANTED_BY)}"
+            )
+
+        if data.target <= 0 or data.reward < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The target must be greater than 0 and the reward 0 or greater"
+            )
+
+        start_at = experience.to_kst(data.start_at) if data.start_at else None
+        end_at = experience.to_kst(data.end_at) if data.end_at else None
+        if start_at and end_at and start_at >= end_at:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The start must be earlier than the end"
+            )
+
+        # Check the target department and job group
+        if data.department_id is not None and not await db.scalar(
+            select(user_model.Department.id).where(user_model.Department.id == data.department_id)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The department with this ID does not exist in the system"
+            )
+        if data.job_group_id is not None and not await db.scalar(
+            select(user_model.JobGroup.id).where(user_model.JobGroup.id == data.job_group_id)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The job group with this ID does not exist in the system"
+            )
+
+        # Add quest to the database
+        db_quest = quest_model.Quest(**data.model_dump(exclude={"start_at", "end_at"}), start_at=start_at, end_at=end_at)
+
+        db.add(db_quest)
+        await versions.bump(db, "quests")
+        await db.commit()
+        await db.refresh(db_quest)
+
+        return db_quest
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+@router.get("/quests", response_model=List[quest_schema.Quest], status_code=status.HTTP_200_OK)
+async def get_quests(
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    active: bool = Query(False)  # true: 활성 퀘스트만
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        query = select(quest_model.Quest)
+        if active:
+            query = query.where(quest_model.Quest.is_active.is_(True))
+
+        return (await db.execute(query.order_by(quest_model.Quest.id))).scalars().all()
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+@router.put("/quest/{quest_id}", response_model=quest_schema.Quest, status_code=status.HTTP_200_OK)
+async def update_quest(
+    quest_id: int,
+    data: quest_schema.QuestUpdate,
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        db_quest = await db.scalar(select(quest_model.Quest).where(quest_model.Quest.id == quest_id))
+        if not db_quest:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Quest not found"
+            )
+
+        if (data.target is not None and data.target <= 0) or (data.reward is not None and data.reward < 0):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The target must be greater than 0 and the reward 0 or greater"
+            )
+
+        end_at = experience.to_kst(data.end_at) if data.end_at else None
+        if end_at and db_quest.start_at and db_quest.start_at >= end_at:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The start must be earlier than the end"
+            )
+
+        # Update quest (progress made so far is kept)
+        for field, value in data.model_dump(exclude_none=True, exclude={"end_at"}).items():
+            setattr(db_quest, field, value)
+        if end_at:
+            db_quest.end_at = end_at
+
+        await versions.bump(db, "quests")
+        await db.commit()
+        await db.refresh(db_quest)
+
+        return db_quest
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
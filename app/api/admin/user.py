@@ -1,139 +1,225 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import and_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, tuple_, select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from core.security import user_oauth2_scheme, admin_oauth2_scheme
 from core.etc import KST, Permission
+from core.config import get_settings
 
 from db.session import get_db
 from db.schemas import admin_schema, user_schema
 from db.models import admin_model, user_model, experience_model
 
-from utils import utils, jwt, hash
+from utils import utils, jwt, hash, level, reference, search, user_import, user_export
+from utils.leaderboard import leaderboard
 
 import traceback
 
 router = APIRouter()
 
-@router.get("/users", status_code=status.HTTP_200_OK)
+# Sortable columns for the user list, each backed by an index that ends in users.id
+USER_SORT_COLUMNS = {
+    "id": user_model.User.id,
+    "employee_id": user_model.User.employee_id,
+    "join_date": user_model.User.join_date,
+}
+
+@router.get("/users", response_model=user_schema.Users, status_code=status.HTTP_200_OK)
 async def get_users(
     access_token: str = Depends(admin_oauth2_scheme),
-    db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0),  # 기본값: 0, 0 이상의 값만 허용
-    limit: int = Query(10, gt=0)   # 기본값: 10, 0보다 큰 값만 허용
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None),  # 이전 페이지의 next_cursor
+    limit: int = Query(10, gt=0),  # 기본값: 10, 0보다 큰 값만 허용 (최대 max_page_size)
+    sort: str = Query("id", pattern="^(id|employee_id|join_date)$")
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
-
-        # Get users from the database with pagination
-        db_users = (
-            db.query(user_model.User)
-            .options(
-                joinedload(user_model.User.job_group),
-                joinedload(user_model.User.department),
-                joinedload(user_model.User.experiences)
-            )
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-        
-        if not db_users:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Users not found"
-            )
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        limit = min(limit, get_settings().max_page_size)
+        sort_column = USER_SORT_COLUMNS[sort]
+
+        # Get users from the database with keyset pagination
+        query = select(user_model.User)
+
+        if cursor:
+            keyset = utils.decode_cursor(cursor)
+            try:
+                cursor_sort, last_value, last_id = keyset
+                if cursor_sort != sort or not isinstance(last_id, int):
+                    raise ValueError
+                if sort == "join_date":
+                    last_value = datetime.fromisoformat(last_value)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+
+            if sort == "id":
+                query = query.where(user_model.User.id > last_id)
+            else:
+                query = query.where(tuple_(sort_column, user_model.User.id) > tuple_(last_value, last_id))
+
+        if sort == "id":
+            query = query.order_by(user_model.User.id)
+        else:
+            query = query.order_by(sort_column, user_model.User.id)
+
+        # Fetch one extra row to know whether there is a next page
+        db_users = (await db.execute(query.limit(limit + 1))).scalars().all()
+
+        next_cursor = None
+        if len(db_users) > limit:
+            db_users = db_users[:limit]
+            last_user = db_users[-1]
+            next_cursor = utils.encode_cursor([sort, getattr(last_user, sort), last_user.id])
         
         # Data processing
+        ladder = await level.get_ladder(db)
         users = []
         for user in db_users:
-            if not user.department.name or not user.job_group.name:
+            # Department and job group names come from the in-process registry
+            department_name, job_group_name = await reference.names(db, user.department_id, user.job_group_id)
+            if not department_name or not job_group_name:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Department or Job group not found"
                 )
             
-            # Caclulate total experience
-            total_exp = sum(db_exp.amount for db_exp in user.experiences)
-            
-            # Find the level corresponding to the total_exp
-            db_level = (
-                db.query(experience_model.Level)
-                .filter(experience_model.Level.total_required_experience <= total_exp)
-                .order_by(experience_model.Level.total_required_experience.desc())
-                .first()
-            )
-
-            # If a matching level is found, get its name
-            level_name = db_level.name if db_level else "No Level"
+            # Total experience is maintained on each experience grant
+            total_exp = user.total_experience
                 
             user_base = user_schema.User(
                 employee_id=user.employee_id,
                 username=user.username,
                 name=user.name,
                 join_date=user.join_date,
-                job_group_name=user.job_group.name,
-                department_name=user.department.name,
+                job_group_name=job_group_name,
+                department_name=department_name,
                 total_experience=total_exp,
-                level=level_name
+                level=ladder.level_name(total_exp),
+                experience_to_next_level=ladder.experience_to_next_level(total_exp),
+                level_progress_percent=ladder.progress_percent(total_exp)
             )
             users.append(user_base)
 
-        return users
+        return user_schema.Users(data=users, next_cursor=next_cursor)
     except Exception as e:
         print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
+
+# 사용자 검색 (사번, 아이디, 이름, 부서, 직무 그룹 접두어)
+@router.get("/search", response_model=user_schema.Users, status_code=status.HTTP_200_OK)
+async def search_users(
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=100),  # 검색어 (공백으로 구분된 단어 모두 포함)
+    limit: int = Query(10, gt=0)  # 기본값: 10, 0보다 큰 값만 허용 (최대 max_page_size)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        if not search.match_query(q):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The query must contain a letter or a digit"
+            )
+
+        limit = min(limit, get_settings().max_page_size)
+
+        # Best matches first, from the full-text index
+        ranked = search.search_users(db.bind.dialect.name, q, limit).subquery()
+        db_users = (await db.execute(
+            select(user_model.User)
+            .join(ranked, ranked.c.id == user_model.User.id)
+            .order_by(ranked.c.tier, ranked.c.rank, user_model.User.id)
+            .limit(limit)
+        )).scalars().all()
+
+        # Data processing
+        ladder = await level.get_ladder(db)
+        users = []
+        for user in db_users:
+            department_name, job_group_name = await reference.names(db, user.department_id, user.job_group_id)
+            if not department_name or not job_group_name:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Department or Job group not found"
+                )
+
+            total_exp = user.total_experience
+            users.append(user_schema.User(
+                employee_id=user.employee_id,
+                username=user.username,
+                name=user.name,
+                join_date=user.join_date,
+                job_group_name=job_group_name,
+                department_name=department_name,
+                total_experience=total_exp,
+                level=ladder.level_name(total_exp),
+                experience_to_next_level=ladder.experience_to_next_level(total_exp),
+                level_progress_percent=ladder.progress_percent(total_exp)
+            ))
+
+        return user_schema.Users(data=users, next_cursor=None)
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
 
 @router.get("/user/{employee_id}", status_code=status.HTTP_200_OK)
 async def get_user(
     employee_id: str,
     access_token: str = Depends(admin_oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
-
-        db_user = (
-            db.query(user_model.User)
-            .options(
-                joinedload(user_model.User.job_group),
-                joinedload(user_model.User.department),
-                joinedload(user_model.User.experiences)
-            )
-            .filter(user_model.User.employee_id == employee_id)
-            .first()
-        )
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.employee_id == employee_id))
         
         if not db_user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
-        if not db_user.job_group or not db_user.department:
+        department_name, job_group_name = await reference.names(db, db_user.department_id, db_user.job_group_id)
+        if not job_group_name or not department_name:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Job group or Department not found"
             )
         
-        # Caclulate total experience
-        total_exp = sum(db_exp.amount for db_exp in db_user.experiences)
-        
-        # Find the level corresponding to the total_exp
-        db_level = (
-            db.query(experience_model.Level)
-            .filter(experience_model.Level.total_required_experience <= total_exp)
-            .order_by(experience_model.Level.total_required_experience.desc())
-            .first()
-        )
-
-        # If a matching level is found, get its name
-        level_name = db_level.name if db_level else "No Level"
+        # Total experience is maintained on each experience grant
+        total_exp = db_user.total_experience
+        ladder = await level.get_ladder(db)
         
         # Return user
         return user_schema.User(
@@ -141,10 +227,12 @@ async def get_user(
             username=db_user.username,
             name=db_user.name,
             join_date=db_user.join_date,
-            job_group_name=db_user.job_group.name,
-            department_name=db_user.department.name,
+            job_group_name=job_group_name,
+            department_name=department_name,
             total_experience=total_exp,
-            level=level_name
+            level=ladder.level_name(total_exp),
+            experience_to_next_level=ladder.experience_to_next_level(total_exp),
+            level_progress_percent=ladder.progress_percent(total_exp)
         )
 
     except Exception as e:
@@ -154,19 +242,19 @@ async def get_user(
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
 
 @router.post("/user", status_code=status.HTTP_201_CREATED)
 async def create_user(
     data: user_schema.UserCreate, 
     access_token: str = Depends(admin_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        user_id = jwt.admin_decode_access_token(db, access_token).get("uid")
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
 
         # Check if the user already exists
-        db_user = db.query(user_model.User).filter(user_model.User.employee_id == data.employee_id).first()
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.employee_id == data.employee_id))
         if db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -174,14 +262,9 @@ async def create_user(
             )
         
         # Check if the department and job group exist
-        db_department, db_job_group = (
-            db.query(user_model.Department, user_model.JobGroup)
-            .filter(user_model.Department.name == data.department_name)
-            .filter(user_model.JobGroup.name == data.job_group_name)
-            .first()
-        )
+        department_id, job_group_id = await reference.resolve_names(db, data.department_name, data.job_group_name)
 
-        if not db_department or not db_job_group:
+        if not department_id or not job_group_id:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Department or Job group not found"
@@ -195,20 +278,22 @@ async def create_user(
             perm = Permission.USER
         
         # Create a new user
+        db_level = (await level.get_ladder(db)).resolve(0)
         db_user = user_model.User(
             employee_id=data.employee_id,
             username=data.username,
             name=data.name,
-            hashed_password=hash.hash_text(data.password),
+            hashed_password=await hash.hash_text_async(data.password),
             join_date=data.join_date,
-            department_id=db_department.id,
-            job_group_id=db_job_group.id,
-            permission_type=perm
+            department_id=department_id,
+            job_group_id=job_group_id,
+            permission_type=perm,
+            level_id=db_level.id if db_level else None
         )
         
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         if not db_user:
             raise HTTPException(
@@ -216,11 +301,13 @@ async def create_user(
                 detail="Failed to create user"
             )
 
+        leaderboard.update(db_user.id, db_user.department_id, db_user.job_group_id, 0)
+
         # Return success message
         return {"detail": "User created successfully"}
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -237,19 +324,100 @@ async def create_user(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_users(
+    file_format: str = Query("jsonl", alias="format", pattern="^(csv|jsonl)$"),
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        # Stream the whole directory from a server-side cursor
+        return StreamingResponse(
+            user_export.export_users(file_format, get_settings().user_export_chunk_size),
+            media_type="text/csv" if file_format == "csv" else "application/x-ndjson",
+            headers={"Content-Disposition": f"attachment; filename=users.{file_format}"}
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+@router.post("/import", status_code=status.HTTP_200_OK)
+async def import_users(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|jsonl)$"),
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        user_id = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
+
+        # Use the file extension when the format is not given
+        if not file_format:
+            file_format = "csv" if (file.filename or "").lower().endswith(".csv") else "jsonl"
+
+        # Resolve departments and job groups once for the whole file
+        registry = await reference.load_registry(db)
+        departments = registry.departments.ids()
+        job_groups = registry.job_groups.ids()
+
+        # Stream NDJSON progress and per-row errors while importing
+        return StreamingResponse(
+            user_import.import_users(
+                file.file, file_format, departments, job_groups, get_settings().user_import_chunk_size
+            ),
+            media_type="application/x-ndjson"
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
 
 @router.post("user/{employee_id}/favorite", status_code=status.HTTP_201_CREATED)
 async def add_user_favorite(
     employee_id: str,
     access_token: str = Depends(user_oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        uid = jwt.admin_decode_access_token(db, access_token).get("uid")
+        uid = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
         
         # Check if the user exists
-        db_user = db.query(user_model.User).filter(user_model.User.employee_id == employee_id).first()
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.employee_id == employee_id))
         if not db_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -257,8 +425,8 @@ async def add_user_favorite(
             )
         
         # Check if the user is already in the favorite list
-        db_favorite = db.query(admin_model.Favorite).filter(and_(
-            admin_model.Favorite.user_id == db_user.id, admin_model.Favorite.admin_id == uid)).first()
+        db_favorite = await db.scalar(select(admin_model.Favorite).where(and_(
+            admin_model.Favorite.user_id == db_user.id, admin_model.Favorite.admin_id == uid)))
         
         if db_favorite:
             raise HTTPException(
@@ -269,8 +437,8 @@ async def add_user_favorite(
         # Add favorite
         db_favorite = admin_model.Favorite(user_id=db_user.id, admin_id=uid)
         db.add(db_favorite)
-        db.commit()
-        db.refresh(db_favorite)
+        await db.commit()
+        await db.refresh(db_favorite)
         
         if not db_favorite:
             raise HTTPException(
@@ -281,7 +449,7 @@ async def add_user_favorite(
         return {"detail": "Favorite added successfully"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -298,19 +466,19 @@ async def add_user_favorite(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 @router.delete("user/{employee_id}/favorite", status_code=status.HTTP_200_OK)
 async def delete_user_favorite(
     employee_id: str,
     access_token: str = Depends(user_oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        uid = jwt.admin_decode_access_token(db, access_token).get("uid")
+        uid = (await jwt.admin_decode_access_token(db, access_token)).get("uid")
         
         # Check if the user exists
-        db_user = db.query(user_model.User).filter(user_model.User.employee_id == employee_id).first()
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.employee_id == employee_id))
         if not db_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -318,8 +486,8 @@ async def delete_user_favorite(
             )
         
         # Check if the user is in the favorite list
-        db_favorite = db.query(admin_model.Favorite).filter(and_(
-            admin_model.Favorite.user_id == db_user.id, admin_model.Favorite.admin_id == uid)).first()
+        db_favorite = await db.scalar(select(admin_model.Favorite).where(and_(
+            admin_model.Favorite.user_id == db_user.id, admin_model.Favorite.admin_id == uid)))
         
         if not db_favorite:
             raise HTTPException(
@@ -328,13 +496,13 @@ async def delete_user_favorite(
             )
         
         # Delete favorite
-        db.delete(db_favorite)
-        db.commit()
+        await db.delete(db_favorite)
+        await db.commit()
         
         return {"detail": "Favorite deleted successfully"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -351,7 +519,7 @@ async def delete_user_favorite(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 
 
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
@@ -10,7 +10,8 @@ from db.session import get_db
 from db.schemas import user_schema, experience_schema
 from db.models import user_model, experience_model
 
-from utils import utils, jwt, hash
+from utils import utils, jwt, hash, level
+from utils.versions import versions, etag, not_modified
 
 import traceback
 
@@ -19,12 +20,21 @@ router = APIRouter()
 # 레벨 조건 조회
 @router.get("/levels", status_code=status.HTTP_200_OK)
 async def get_levels(
+    request: Request,
+    response: Response,
     access_token: str = Depends(admin_oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        jwt.all_decode_access_token(access_token)
-        db_levels = db.query(experience_model.Level).all()
+        await jwt.all_decode_access_token(db, access_token)
+
+        # Answer from the version counter when the client is up to date
+        cached = not_modified(request, response, etag("levels", versions.get("levels")))
+        if cached:
+            return cached
+
+        # Levels are served from the in-process ladder
+        db_levels = (await level.get_ladder(db)).levels
         if not db_levels:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -40,5 +50,5 @@ async def get_levels(
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
 
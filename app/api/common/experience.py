@@ -1,18 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
 from core.security import user_oauth2_scheme, admin_oauth2_scheme
-from core.etc import KST
+from core.etc import KST, Permission
+from core.config import get_settings
 
 from db.session import get_db
 from db.schemas import user_schema, experience_schema
 from db.models import user_model, experience_model
 
-from utils import utils, jwt, hash
+from utils import utils, jwt, hash, experience, quests
 
 import traceback
 
@@ -23,10 +24,12 @@ router = APIRouter()
 async def create_experience(
     data: experience_schema.ExperienceCreate,
     access_token: str = Depends(admin_oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-        uid = jwt.admin_leader_decode_access_token(db, access_token).get("uid")
+        payload = await jwt.admin_leader_decode_access_token(db, access_token)
+        uid = payload.get("uid")
+        granted_by = "leader" if payload.get("perm") == Permission.LEADER.value else "admin"
         
         if data.amount <= 0:
             raise HTTPException(
@@ -35,31 +38,26 @@ async def create_experience(
             )
         
         # Check if the employee exists
-        db_user = db.query(user_model.User).filter(user_model.User.employee_id == data.employee_id).first()
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.employee_id == data.employee_id))
         if not db_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="The employee with this ID does not exist in the system"
             )
 
-        # Create experience
-        db_experience = experience_model.Experience(
-            user_id=db_user.id,
-            amount=data.amount
-        )
-        db.add(db_experience)
-        db.commit()
-        db.refresh(db_experience)
-        if not db_experience:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Failed to create experience")
+        # Back off while quest progress is behind, rather than lose the grant's progress
+        quests.engine.admit()
+
+        # Create experience and update the user's total experience and level
+        results = await experience.add_experiences(db, [(db_user.id, data.amount)])
+        await db.commit()
+        experience.publish_grants(results, granted_by)
 
         # Return success message
         return {"detail": "Experience created successfully"}
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -76,8 +74,80 @@ async def create_experience(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
+
+# Only can be accessed by the admin or the leader
+@router.post("/batch", response_model=experience_schema.ExperienceBatchResult, status_code=status.HTTP_201_CREATED)
+async def create_experiences(
+    data: experience_schema.ExperienceBatchCreate,
+    access_token: str = Depends(admin_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        payload = await jwt.admin_leader_decode_access_token(db, access_token)
+        uid = payload.get("uid")
+        granted_by = "leader" if payload.get("perm") == Permission.LEADER.value else "admin"
+
+        if not data.items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The batch must not be empty"
+            )
+
+        max_size = get_settings().experience_batch_max_size
+        if len(data.items) > max_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The batch must not contain more than {max_size} items"
+            )
+
+        # Resolve all employee IDs with one query
+        employee_ids = {item.employee_id for item in data.items}
+        user_ids = dict((await db.execute(
+            select(user_model.User.employee_id, user_model.User.id).where(user_model.User.employee_id.in_(employee_ids))
+        )).all())
+
+        # Validate each item
+        grants, results = [], []
+        for item in data.items:
+            if item.amount <= 0:
+                results.append(experience_schema.ExperienceBatchItemResult(
+                    employee_id=item.employee_id, amount=item.amount, status="invalid_amount"))
+            elif item.employee_id not in user_ids:
+                results.append(experience_schema.ExperienceBatchItemResult(
+                    employee_id=item.employee_id, amount=item.amount, status="not_found"))
+            else:
+                grants.append((user_ids[item.employee_id], item.amount))
+                results.append(experience_schema.ExperienceBatchItemResult(
+                    employee_id=item.employee_id, amount=item.amount, status="created"))
 
+        # Back off while quest progress is behind, rather than lose the grants' progress
+        quests.engine.admit()
 
+        # Create all experiences in one transaction
+        granted = await experience.add_experiences(db, grants)
+        await db.commit()
+        experience.publish_grants(granted, granted_by)
 
+        # Return per-item results
+        return experience_schema.ExperienceBatchResult(created=len(grants), results=results)
 
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
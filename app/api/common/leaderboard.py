@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Optional
+
+from core.security import user_oauth2_scheme, admin_oauth2_scheme
+from core.config import get_settings
+
+from db.session import get_db
+from db.schemas import experience_schema
+from db.models import user_model
+
+from utils import utils, jwt, level
+from utils.leaderboard import leaderboard
+
+import traceback
+
+router = APIRouter()
+
+# 경험치 랭킹 조회 (전체, 부서별, 직무 그룹별)
+@router.get("", response_model=experience_schema.Leaderboard, status_code=status.HTTP_200_OK)
+async def get_leaderboard(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    scope: str = Query("global", pattern="^(global|department|job_group)$"),
+    scope_id: Optional[int] = Query(None),  # department 또는 job_group의 id
+    limit: int = Query(10, gt=0)
+):
+    try:
+        await jwt.all_decode_access_token(db, access_token)
+
+        if scope != "global" and scope_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="scope_id is required for this scope"
+            )
+
+        # Rankings are served from memory
+        total_users, entries = leaderboard.top(scope, scope_id, min(limit, get_settings().max_page_size))
+
+        # Names of the ranked users, by primary key
+        db_users = {}
+        if entries:
+            db_users = {row.id: row for row in (await db.execute(
+                select(user_model.User.id, user_model.User.employee_id, user_model.User.name)
+                .where(user_model.User.id.in_([user_id for _, user_id, _ in entries]))
+            )).all()}
+
+        ladder = await level.get_ladder(db)
+        data = [
+            experience_schema.LeaderboardEntry(
+                rank=rank,
+                employee_id=db_users[user_id].employee_id,
+                name=db_users[user_id].name,
+                total_experience=total,
+                level=ladder.level_name(total)
+            )
+            for rank, user_id, total in entries
+            if user_id in db_users
+        ]
+
+        return experience_schema.Leaderboard(scope=scope, scope_id=scope_id, total_users=total_users, data=data)
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error"
+        )
+    finally:
+        await db.close()
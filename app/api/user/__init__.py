@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from api.user import user, auth, experience
+from api.user import user, auth, board, experience, notification, quest
 
 api_v1_router = APIRouter(prefix="/api/v1")
 
@@ -7,5 +7,8 @@ api_v1_router = APIRouter(prefix="/api/v1")
 api_v1_router.include_router(user.router, tags=["user"], prefix="/user")
 api_v1_router.include_router(auth.router, tags=["user/auth"], prefix="/user/auth")
 api_v1_router.include_router(experience.router, tags=["user/experience"], prefix="/user/experience")
+api_v1_router.include_router(notification.router, tags=["user/notification"], prefix="/user/notification")
+api_v1_router.include_router(quest.router, tags=["user/quest"], prefix="/user/quest")
+api_v1_router.include_router(board.router, tags=["user/board"], prefix="/user/board")
 
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
 
@@ -21,55 +21,36 @@ router = APIRouter()
 @router.post("/login", response_model=user_schema.JwtToken, status_code=status.HTTP_200_OK)
 async def login_user(
     data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Check if the email is valid
-        db_user = db.query(user_model.User).filter(or_(
-            user_model.User.username == data.username, user_model.User.employee_id == data.username)).first()
+        db_user = await db.scalar(select(user_model.User).where(or_(
+            user_model.User.username == data.username, user_model.User.employee_id == data.username)))
         if not db_user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
 
         # Check if the password is valid
-        if not hash.verify_hashed_text(data.password, db_user.hashed_password):
+        if not await hash.verify_hashed_text_async(data.password, db_user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username or password")
         
         # Create JWT tokens
         if db_user.permission_type == Permission.LEADER:
-            access_token = jwt.create_access_token("access", db_user.id, Permission.LEADER)
+            access_token = await jwt.issue_access_token(db, "user", db_user.id, Permission.LEADER)
             refresh_token = jwt.create_refresh_token("refresh", db_user.id, Permission.LEADER)
         else:
-            access_token = jwt.create_access_token("access", db_user.id, Permission.USER)
+            access_token = await jwt.issue_access_token(db, "user", db_user.id, Permission.USER)
             refresh_token = jwt.create_refresh_token("refresh", db_user.id, Permission.USER)
         
-        db_jwt = db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.user_id == db_user.id).first()
-        if db_jwt:
-            # Update JWT token in the database
-            db_jwt.access_token = access_token
-            db_jwt.refresh_token = refresh_token
-            db.commit()
-            db.refresh(db_jwt)
-        else:
-            # Add JWT token to the database
-            db_jwt = user_model.UserJwtToken(
-                user_id=db_user.id,
-                access_token=access_token,
-                refresh_token=refresh_token
-            )
-            db.add(db_jwt)
-            db.commit()
-            db.refresh(db_jwt)
-            if not db_jwt:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to create JWT token"
-                )
+        # Sync JWT token with the database (the old tokens are no longer valid)
+        await jwt.store_tokens(db, "user", db_user.id, access_token, refresh_token)
+        await db.commit()
         
         # Return JWT token
         return user_schema.JwtToken(access_token=access_token, refresh_token=refresh_token)
 
     except Exception as e:
-        db.rollback()  # transaction rollback
+        await db.rollback()  # transaction rollback
         print(traceback.format_exc())  # print error log on console (comment out if not needed)
 
         # Check the exception type
@@ -86,33 +67,30 @@ async def login_user(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 @router.post("/refresh", response_model=user_schema.JwtToken, status_code=status.HTTP_200_OK)
 async def refresh_token(
     refresh_token: str = Depends(user_oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         # Verify the refresh token
-        user_id = jwt.user_decode_refresh_token(db, refresh_token).get('uid')
+        payload = await jwt.user_decode_refresh_token(db, refresh_token)
+        user_id = payload.get('uid')
         
-        access_token = jwt.create_access_token("access", user_id)
+        # Keep the permission (user or leader) of the refresh token
+        access_token = await jwt.issue_access_token(db, "user", user_id, Permission(payload.get("perm")))
         
-        # Update JWT token in the database
-        db_jwt = db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.user_id == user_id).first()
-        if db_jwt:
-            db_jwt.access_token = access_token
-            db.commit()
-            db.refresh(db_jwt)
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Failed to update refresh token")
+        # Update JWT token in the database (the refresh token is kept)
+        await jwt.store_tokens(db, "user", user_id, access_token)
+        await db.commit()
 
         # Return JWT token
         return user_schema.JwtToken(access_token=access_token, refresh_token=refresh_token)
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(traceback.format_exc())
         
         # Check the exception type
@@ -129,7 +107,7 @@ async def refresh_token(
                 detail="Internal server error"
             )
     finally:
-        db.close()
+        await db.close()
 
 
 
@@ -0,0 +1,476 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime
+from typing import Optional
+
+from core.config import get_settings
+from core.security import user_oauth2_scheme
+
+from db.session import get_db
+from db.schemas import board_schema
+from db.models import user_model, board_model
+
+from utils import utils, jwt, board, search
+from utils.board import hot_feed
+
+import traceback
+
+router = APIRouter()
+
+def parse_cursor(cursor: str):
+    """(created_at, id) of a board cursor."""
+    keyset = utils.decode_cursor(cursor)
+    try:
+        last_created_at, last_id = keyset
+        if not isinstance(last_id, int):
+            raise ValueError
+        return datetime.fromisoformat(last_created_at), last_id
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def get_post_in_department(db: AsyncSession, post_id: int, department_id: int):
+    """Check that the post is on the board of `department_id`."""
+    post_department_id = await db.scalar(select(board_model.Post.department_id).where(board_model.Post.id == post_id))
+    if post_department_id is None or post_department_id != department_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Post not found"
+        )
+
+# 부서 게시판 글 목록 (최신순)
+@router.get("/posts", response_model=board_schema.Posts, status_code=status.HTTP_200_OK)
+async def get_posts(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None),  # 이전 페이지의 next_cursor
+    limit: int = Query(20, gt=0)  # 기본값: 20, 0보다 큰 값만 허용 (최대 max_page_size)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        department_id = await board.department_of(db, uid)
+        limit = min(limit, get_settings().max_page_size)
+        posts = board_model.Post
+
+        # Served by the (department_id, created_at, id) index
+        query = board.post_query().where(posts.department_id == department_id)
+        if cursor:
+            query = query.where(tuple_(posts.created_at, posts.id) < tuple_(*parse_cursor(cursor)))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = (await db.execute(query.order_by(posts.created_at.desc(), posts.id.desc()).limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = utils.encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+
+        return board_schema.Posts(data=rows, next_cursor=next_cursor)
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 부서 게시판 인기 글 (주기적으로 계산된 결과)
+@router.get("/hot", response_model=board_schema.HotPosts, status_code=status.HTTP_200_OK)
+async def get_hot_posts(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    limit: int = Query(20, gt=0)  # 기본값: 20, 0보다 큰 값만 허용 (최대 board_hot_size)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        department_id = await board.department_of(db, uid)
+
+        # Served from memory
+        return board_schema.HotPosts(
+            department_id=department_id,
+            scored_at=hot_feed.scored_at,
+            data=hot_feed.get(department_id, limit)
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 부서 게시판 검색 (제목, 본문)
+@router.get("/search", response_model=board_schema.Posts, status_code=status.HTTP_200_OK)
+async def search_posts(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    q: str = Query(..., min_length=1, max_length=100),  # 검색어 (공백으로 구분된 단어 모두 포함)
+    limit: int = Query(20, gt=0)  # 기본값: 20, 0보다 큰 값만 허용 (최대 max_page_size)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        department_id = await board.department_of(db, uid)
+
+        if not search.match_query(q):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The query must contain a letter or a digit"
+            )
+
+        limit = min(limit, get_settings().max_page_size)
+        posts = board_model.Post
+
+        # Best matches on the department's board first, from the full-text index
+        ranked = search.search_posts(db.bind.dialect.name, q, department_id, limit).subquery()
+        rows = (await db.execute(
+            board.post_query()
+            .join(ranked, ranked.c.id == posts.id)
+            .order_by(ranked.c.rank, posts.id.desc())
+            .limit(limit)
+        )).all()
+
+        return board_schema.Posts(data=rows, next_cursor=None)
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 글 작성
+@router.post("/post", response_model=board_schema.Post, status_code=status.HTTP_201_CREATED)
+async def create_post(
+    data: board_schema.PostCreate,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        if not data.title.strip() or not data.content.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The title and the content must not be empty"
+            )
+
+        db_post = board_model.Post(
+            user_id=uid,
+            department_id=await board.department_of(db, uid),
+            title=data.title,
+            content=data.content
+        )
+        db.add(db_post)
+        await db.commit()
+
+        return (await db.execute(board.post_query().where(board_model.Post.id == db_post.id))).first()
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 글 조회
+@router.get("/post/{post_id}", response_model=board_schema.Post, status_code=status.HTTP_200_OK)
+async def get_post(
+    post_id: int,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        row = (await db.execute(
+            board.post_query().where(
+                board_model.Post.id == post_id,
+                board_model.Post.department_id == await board.department_of(db, uid)
+            )
+        )).first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Post not found"
+            )
+
+        return row
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 댓글 목록 (작성순)
+@router.get("/post/{post_id}/comments", response_model=board_schema.Comments, status_code=status.HTTP_200_OK)
+async def get_comments(
+    post_id: int,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None),  # 이전 페이지의 next_cursor
+    limit: int = Query(20, gt=0)  # 기본값: 20, 0보다 큰 값만 허용 (최대 max_page_size)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        await get_post_in_department(db, post_id, await board.department_of(db, uid))
+        limit = min(limit, get_settings().max_page_size)
+        comments = board_model.Comment
+
+        # Served by the (post_id, created_at, id) index
+        query = (
+            select(comments.id, user_model.User.name.label("author"), comments.content, comments.created_at)
+            .join(user_model.User, user_model.User.id == comments.user_id)
+            .where(comments.post_id == post_id)
+        )
+        if cursor:
+            query = query.where(tuple_(comments.created_at, comments.id) > tuple_(*parse_cursor(cursor)))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = (await db.execute(query.order_by(comments.created_at, comments.id).limit(limit + 1))).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = utils.encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+
+        return board_schema.Comments(data=rows, next_cursor=next_cursor)
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 댓글 작성
+@router.post("/post/{post_id}/comment", response_model=board_schema.Comment, status_code=status.HTTP_201_CREATED)
+async def create_comment(
+    post_id: int,
+    data: board_schema.CommentCreate,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        await get_post_in_department(db, post_id, await board.department_of(db, uid))
+
+        if not data.content.strip():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The content must not be empty"
+            )
+
+        db_comment = board_model.Comment(post_id=post_id, user_id=uid, content=data.content)
+        db.add(db_comment)
+
+        # Keep the denormalized counter in the same transaction
+        await db.execute(
+            update(board_model.Post)
+            .where(board_model.Post.id == post_id)
+            .values(comment_count=board_model.Post.comment_count + 1)
+        )
+        await db.commit()
+
+        return board_schema.Comment(
+            id=db_comment.id,
+            author=await db.scalar(select(user_model.User.name).where(user_model.User.id == uid)),
+            content=db_comment.content,
+            created_at=db_comment.created_at
+        )
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 좋아요
+@router.post("/post/{post_id}/like", response_model=board_schema.Like, status_code=status.HTTP_200_OK)
+async def like_post(
+    post_id: int,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        await get_post_in_department(db, post_id, await board.department_of(db, uid))
+        posts = board_model.Post
+
+        # Liking twice is a no-op; the counter only moves when a row was added
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+        liked = (await db.execute(
+            dialect.insert(board_model.PostLike)
+            .values(post_id=post_id, user_id=uid)
+            .on_conflict_do_nothing()
+            .returning(board_model.PostLike.post_id)
+        )).first()
+        if liked:
+            like_count = await db.scalar(
+                update(posts).where(posts.id == post_id).values(like_count=posts.like_count + 1).returning(posts.like_count)
+            )
+        else:
+            like_count = await db.scalar(select(posts.like_count).where(posts.id == post_id))
+        await db.commit()
+
+        return board_schema.Like(like_count=like_count)
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 좋아요 취소
+@router.delete("/post/{post_id}/like", response_model=board_schema.Like, status_code=status.HTTP_200_OK)
+async def unlike_post(
+    post_id: int,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        await get_post_in_department(db, post_id, await board.department_of(db, uid))
+        posts = board_model.Post
+
+        unliked = (await db.execute(
+            delete(board_model.PostLike)
+            .where(board_model.PostLike.post_id == post_id, board_model.PostLike.user_id == uid)
+            .returning(board_model.PostLike.post_id)
+        )).first()
+        if unliked:
+            like_count = await db.scalar(
+                update(posts).where(posts.id == post_id).values(like_count=posts.like_count - 1).returning(posts.like_count)
+            )
+        else:
+            like_count = await db.scalar(select(posts.like_count).where(posts.id == post_id))
+        await db.commit()
+
+        return board_schema.Like(like_count=like_count)
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
+from core.config import get_settings
 from core.security import user_oauth2_scheme, admin_oauth2_scheme
 
 from db.session import get_db
 from db.schemas import user_schema, experience_schema
 from db.models import user_model, experience_model
 
-from utils import utils, jwt, hash
+from utils import utils, jwt, hash, level, experience
+from utils.leaderboard import leaderboard
+from utils.versions import versions, etag, not_modified
 
 import traceback
 
@@ -19,27 +23,180 @@ router = APIRouter()
 
 # 본인의 경험치 조회
 @router.get("", response_model=experience_schema.Experiences, status_code=status.HTTP_200_OK)
-async def get_experiences(access_token: str = Depends(user_oauth2_scheme), db: Session = Depends(get_db)):
+async def get_experiences(
+    request: Request,
+    response: Response,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None),  # 이전 페이지의 next_cursor
+    limit: int = Query(20, gt=0),  # 기본값: 20, 0보다 큰 값만 허용 (최대 max_page_size)
+    date_from: Optional[datetime] = Query(None, alias="from"),  # 이 시각 이후 (포함)
+    date_to: Optional[datetime] = Query(None, alias="to")  # 이 시각 이전 (미포함)
+):
     try:
-        uid = jwt.user_leader_decode_access_token(db, access_token).get("uid")
-
-        db_user = db.query(user_model.User).options(joinedload(user_model.User.experiences)).filter(user_model.User.id == uid).first()
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
 
+        db_user = await db.scalar(select(user_model.User).where(user_model.User.id == uid))
         if not db_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Experiences not found"
             )
+
+        # The stored total is written by every grant and only grows, so this one-row read
+        # versions the user's history on every worker; the history queries are skipped
+        cached = not_modified(request, response, etag(
+            "experience", uid, db_user.total_experience, versions.get("levels"), request.url.query
+        ))
+        if cached:
+            return cached
+
+        limit = min(limit, get_settings().max_page_size)
+
+        # Both queries below are served by the (user_id, created_at) index
+        filters = [experience_model.Experience.user_id == uid]
+        if date_from:
+            filters.append(experience_model.Experience.created_at >= experience.to_kst(date_from))
+        if date_to:
+            filters.append(experience_model.Experience.created_at < experience.to_kst(date_to))
+
+        period_exp = await db.scalar(
+            select(func.coalesce(func.sum(experience_model.Experience.amount), 0)).where(*filters)
+        )
+
+        query = select(experience_model.Experience).where(*filters)
+        if cursor:
+            keyset = utils.decode_cursor(cursor)
+            try:
+                last_created_at, last_id = keyset
+                if not isinstance(last_id, int):
+                    raise ValueError
+                last_created_at = datetime.fromisoformat(last_created_at)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            query = query.where(
+                tuple_(experience_model.Experience.created_at, experience_model.Experience.id) < tuple_(last_created_at, last_id)
+            )
+
+        # Fetch one extra row to know whether there is a next page
+        db_experiences = (await db.execute(
+            query
+            .order_by(experience_model.Experience.created_at.desc(), experience_model.Experience.id.desc())
+            .limit(limit + 1)
+        )).scalars().all()
+
+        next_cursor = None
+        if len(db_experiences) > limit:
+            db_experiences = db_experiences[:limit]
+            last_experience = db_experiences[-1]
+            next_cursor = utils.encode_cursor([last_experience.created_at.isoformat(), last_experience.id])
+
+        total_exp = db_user.total_experience
+        ladder = await level.get_ladder(db)
         
-        total_exp = sum(db_exp.amount for db_exp in db_user.experiences)
-        
-        return experience_schema.Experiences(total_experience=total_exp, data=db_user.experiences)
+        return experience_schema.Experiences(
+            total_experience=total_exp,
+            level=ladder.level_name(total_exp),
+            experience_to_next_level=ladder.experience_to_next_level(total_exp),
+            level_progress_percent=ladder.progress_percent(total_exp),
+            period_experience=period_exp,
+            data=db_experiences,
+            next_cursor=next_cursor
+        )
     
     except Exception as e:
         print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 본인의 기간별 경험치 조회
+@router.get("/timeseries", response_model=experience_schema.ExperienceTimeseries, status_code=status.HTTP_200_OK)
+async def get_timeseries(
+    granularity: str = Query("week", pattern="^(day|week|month)$"),
+    start: Optional[datetime] = Query(None),  # 기본값: granularity에 따라 30일, 52주, 12개월 전
+    end: Optional[datetime] = Query(None),  # 기본값: 현재 시각
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        start, end = experience.timeseries_range(granularity, start, end)
+        if start >= end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The start must be earlier than the end"
+            )
+
+        return experience_schema.ExperienceTimeseries(
+            granularity=granularity,
+            start=start,
+            end=end,
+            data=await experience.get_timeseries(db, "user", uid, granularity, start, end)
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 본인의 경험치 랭킹 조회
+@router.get("/rank", response_model=experience_schema.Rank, status_code=status.HTTP_200_OK)
+async def get_rank(access_token: str = Depends(user_oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        # Ranks are served from memory
+        ranks = leaderboard.ranks(uid)
+        total_exp = leaderboard.global_ranking.totals.get(uid, 0)
+
+        return experience_schema.Rank(
+            total_experience=total_exp,
+            global_rank=ranks["global"],
+            department_rank=ranks["department"],
+            job_group_rank=ranks["job_group"]
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
     finally:
-        db.close()
+        await db.close()
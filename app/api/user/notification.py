@@ -0,0 +1,209 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+from typing import Optional
+
+from core.config import get_settings
+from core.security import user_oauth2_scheme
+
+from db.session import get_db
+from db.schemas import notification_schema
+from db.models import notification_model
+
+from utils import utils, jwt
+from utils.notifications import bus
+
+import traceback
+
+router = APIRouter()
+
+# 본인의 알림 목록 조회
+@router.get("", response_model=notification_schema.Notifications, status_code=status.HTTP_200_OK)
+async def get_notifications(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+    unread: bool = Query(False),  # true: 읽지 않은 알림만
+    cursor: Optional[str] = Query(None),  # 이전 페이지의 next_cursor
+    limit: int = Query(20, gt=0)  # 기본값: 20, 0보다 큰 값만 허용 (최대 max_page_size)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        limit = min(limit, get_settings().max_page_size)
+        notifications = notification_model.Notification
+
+        # The unread count and list are served by the (user_id, read, created_at) index,
+        # the full list by the (user_id, created_at, id) index
+        unread_count = await db.scalar(
+            select(func.count()).select_from(notifications).where(notifications.user_id == uid, notifications.read.is_(False))
+        )
+
+        query = select(notifications).where(notifications.user_id == uid)
+        if unread:
+            query = query.where(notifications.read.is_(False))
+        if cursor:
+            keyset = utils.decode_cursor(cursor)
+            try:
+                last_created_at, last_id = keyset
+                if not isinstance(last_id, int):
+                    raise ValueError
+                last_created_at = datetime.fromisoformat(last_created_at)
+            except (TypeError, ValueError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor"
+                )
+            query = query.where(tuple_(notifications.created_at, notifications.id) < tuple_(last_created_at, last_id))
+
+        # Fetch one extra row to know whether there is a next page
+        db_notifications = (await db.execute(
+            query.order_by(notifications.created_at.desc(), notifications.id.desc()).limit(limit + 1)
+        )).scalars().all()
+
+        next_cursor = None
+        if len(db_notifications) > limit:
+            db_notifications = db_notifications[:limit]
+            last_notification = db_notifications[-1]
+            next_cursor = utils.encode_cursor([last_notification.created_at.isoformat(), last_notification.id])
+
+        return notification_schema.Notifications(unread_count=unread_count, data=db_notifications, next_cursor=next_cursor)
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 새 알림 실시간 수신 (Server-Sent Events)
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def stream_notifications(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        # The stream is fed from memory; the session is closed before it starts
+        return StreamingResponse(
+            bus.stream(uid),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 알림 읽음 처리
+@router.post("/{notification_id}/read", response_model=notification_schema.NotificationRead, status_code=status.HTTP_200_OK)
+async def read_notification(
+    notification_id: int,
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        notifications = notification_model.Notification
+
+        result = await db.execute(
+            update(notifications)
+            .where(notifications.id == notification_id, notifications.user_id == uid)
+            .values(read=True)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Notification not found"
+            )
+        await db.commit()
+
+        return notification_schema.NotificationRead(updated=result.rowcount)
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
+
+# 모든 알림 읽음 처리
+@router.post("/read", response_model=notification_schema.NotificationRead, status_code=status.HTTP_200_OK)
+async def read_notifications(
+    access_token: str = Depends(user_oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+        notifications = notification_model.Notification
+
+        result = await db.execute(
+            update(notifications)
+            .where(notifications.user_id == uid, notifications.read.is_(False))
+            .values(read=True)
+        )
+        await db.commit()
+
+        return notification_schema.NotificationRead(updated=result.rowcount)
+
+    except Exception as e:
+        await db.rollback()
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.security import user_oauth2_scheme
+
+from db.session import get_db
+from db.schemas import quest_schema
+from db.models import user_model, quest_model
+
+from utils import jwt
+from utils.quests import engine as quest_engine
+
+import traceback
+
+router = APIRouter()
+
+# 본인에게 해당하는 진행 중인 퀘스트와 진행도 조회
+@router.get("", response_model=quest_schema.UserQuests, status_code=status.HTTP_200_OK)
+async def get_quests(access_token: str = Depends(user_oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    try:
+        uid = (await jwt.user_leader_decode_access_token(db, access_token)).get("uid")
+
+        db_user = (await db.execute(
+            select(user_model.User.department_id, user_model.User.job_group_id).where(user_model.User.id == uid)
+        )).first()
+        if not db_user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+
+        # Quests come from the in-process index; only the progress rows are read
+        active = await quest_engine.get_active(db)
+        user_quests = active.for_user(db_user.department_id, db_user.job_group_id)
+        progress = {}
+        if user_quests:
+            progress = {row.quest_id: row for row in (await db.execute(
+                select(quest_model.QuestProgress.quest_id, quest_model.QuestProgress.progress, quest_model.QuestProgress.completed_at)
+                .where(
+                    quest_model.QuestProgress.user_id == uid,
+                    quest_model.QuestProgress.quest_id.in_([quest.id for quest in user_quests])
+                )
+            )).all()}
+
+        return quest_schema.UserQuests(data=[
+            quest_schema.UserQuest(
+                **quest.model_dump(),
+                progress=progress[quest.id].progress if quest.id in progress else 0,
+                completed_at=progress[quest.id].completed_at if quest.id in progress else None
+            )
+            for quest in sorted(user_quests, key=lambda quest: quest.id)
+        ])
+
+    except Exception as e:
+        print(traceback.format_exc())
+
+        # Check the exception type
+        if isinstance(e, HTTPException):
+            raise e
+        elif isinstance(e, SQLAlchemyError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Database error occurred"
+            )
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal server error"
+            )
+    finally:
+        await db.close()
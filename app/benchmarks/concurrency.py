@@ -0,0 +1,198 @@
+"""Concurrency benchmark for the database layer.
+
+Compares the old request pattern (``async def`` handler calling the sync
+``SessionLocal``) with the ``AsyncSession`` handlers under parallel load,
+and measures how long a DB-free probe request waits behind them. The app
+is served by uvicorn in a child process so client timings include the
+time a request waits for the server's event loop.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.concurrency --requests 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+# Run against a throwaway database (read by core.config at import time)
+os.environ["database_url"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='do-bench-'), 'bench.db')}"
+
+import httpx
+import uvicorn
+from fastapi import APIRouter, Depends, FastAPI, HTTPException
+from sqlalchemy.orm import joinedload
+
+from core.etc import KST, Permission
+from db.session import Base, SessionLocal, engine
+from db.models import admin_model, auth_model, user_model, experience_model
+from api.admin import api_v1_router as admin_api_v1_router
+from utils import jwt, level
+
+def seed(users: int, experiences_per_user: int) -> str:
+    """Create one admin, its token and `users` users. Return the admin access token."""
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db_department = user_model.Department(name="bench")
+        db_job_group = user_model.JobGroup(name="bench")
+        db_admin = admin_model.Admin(username="bench", hashed_password="-")
+        db.add_all([db_department, db_job_group, db_admin])
+        db.flush()
+
+        access_token = jwt.create_access_token("access", db_admin.id, Permission.ADMIN)
+        db.add(auth_model.AuthSession(
+            digest=jwt.token_digest(access_token), kind="access", principal="admin", principal_id=db_admin.id
+        ))
+        db.add(experience_model.Level(name="L1", total_required_experience=0))
+
+        for i in range(users):
+            db_user = user_model.User(
+                employee_id=f"B{i:06d}",
+                username=f"bench{i}",
+                name="bench",
+                hashed_password="-",
+                department_id=db_department.id,
+                job_group_id=db_job_group.id,
+                total_experience=experiences_per_user * 10
+            )
+            db.add(db_user)
+            db.flush()
+            db.add_all([experience_model.Experience(user_id=db_user.id, amount=10) for _ in range(experiences_per_user)])
+
+        db.commit()
+        return access_token
+    finally:
+        db.close()
+
+# The handler as it was before the async port: sync session on the event loop
+sync_router = APIRouter()
+
+@sync_router.get("/sync/user/{employee_id}")
+async def get_user_sync(employee_id: str, token: str):
+    db = SessionLocal()
+    try:
+        if not db.query(auth_model.AuthSession).filter(auth_model.AuthSession.digest == jwt.token_digest(token)).first():
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        db_user = (
+            db.query(user_model.User)
+            .options(
+                joinedload(user_model.User.job_group),
+                joinedload(user_model.User.department)
+            )
+            .filter(user_model.User.employee_id == employee_id)
+            .first()
+        )
+        return {"employee_id": db_user.employee_id, "total_experience": db_user.total_experience}
+    finally:
+        db.close()
+
+@sync_router.get("/ping")
+async def ping():
+    return {}
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+async def run(client: httpx.AsyncClient, path: str, params: dict, requests: int, concurrency: int) -> dict:
+    latencies, probe_latencies = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            response = await client.get(path.format(employee_id=f"B{i % 1000:06d}"), params=params)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    async def probe():
+        # A DB-free request that should never wait on other requests' queries
+        while len(latencies) < requests:
+            started = time.perf_counter()
+            await client.get("/ping")
+            probe_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.005)
+
+    started = time.perf_counter()
+    await asyncio.gather(probe(), *(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency": percentiles(latencies),
+        "probe_latency": percentiles(probe_latencies),
+    }
+
+def serve(port: int):
+    from db.session import AsyncSessionLocal
+
+    async def lifespan_ladder(app):
+        async with AsyncSessionLocal() as db:
+            await level.load_ladder(db)
+        yield
+
+    app = FastAPI(lifespan=asynccontextmanager(lifespan_ladder))
+    app.include_router(admin_api_v1_router)
+    app.include_router(sync_router)
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+async def wait_until_ready(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            await client.get("/ping")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("benchmark server did not start")
+
+async def main(args):
+    access_token = seed(args.users, args.experiences)
+
+    server = multiprocessing.Process(target=serve, args=(args.port,), daemon=True)
+    server.start()
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency + 1)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await wait_until_ready(client)
+
+            headers = {"Authorization": f"Bearer {access_token}"}
+            client.headers.update(headers)
+            results = {
+                "config": vars(args),
+                "before_sync_session": await run(
+                    client, "/sync/user/{employee_id}", {"token": access_token}, args.requests, args.concurrency
+                ),
+                "after_async_session": await run(
+                    client, "/api/v1/admin/user/user/{employee_id}", {}, args.requests, args.concurrency
+                ),
+            }
+    finally:
+        server.terminate()
+        server.join()
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync vs async session concurrency benchmark")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--experiences", type=int, default=10, help="experience rows per user")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    asyncio.run(main(parser.parse_args()))
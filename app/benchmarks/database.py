@@ -0,0 +1,125 @@
+"""Concurrent reader/writer benchmark for the SQLite connection settings.
+
+Runs reader threads (admin user-detail query) and writer threads
+(experience grant: ledger insert + total update) against a fresh SQLite
+file, once with SQLite defaults (rollback journal, synchronous=FULL) and
+once with the pragmas from db/session.py (WAL, synchronous=NORMAL,
+busy_timeout, cache/mmap size).
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.database --readers 8 --writers 2 --seconds 10
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from db.session import Base, get_engine_options, set_sqlite_pragmas
+from db.models import admin_model, user_model, experience_model
+
+def seed(Session, users: int):
+    db = Session()
+    try:
+        db_department = user_model.Department(name="bench")
+        db_job_group = user_model.JobGroup(name="bench")
+        db.add_all([db_department, db_job_group])
+        db.flush()
+        db.add_all([
+            user_model.User(
+                employee_id=f"B{i:06d}", username=f"bench{i}", name="bench", hashed_password="-",
+                department_id=db_department.id, job_group_id=db_job_group.id
+            )
+            for i in range(users)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+def run(tuned: bool, args) -> dict:
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='do-bench-'), 'bench.db')}"
+    engine = create_engine(database_url, **get_engine_options(database_url))
+    if tuned:
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+    seed(Session, args.users)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def count(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        db = Session()
+        i = n
+        while time.perf_counter() < deadline:
+            try:
+                db.query(user_model.User).options(
+                    joinedload(user_model.User.department), joinedload(user_model.User.job_group)
+                ).filter(user_model.User.employee_id == f"B{i % args.users:06d}").first()
+                db.rollback()
+                count("reads")
+            except OperationalError:
+                db.rollback()
+                count("errors")
+            i += 7
+        db.close()
+
+    def writer(n):
+        db = Session()
+        i = n
+        while time.perf_counter() < deadline:
+            try:
+                user_id = i % args.users + 1
+                db.add(experience_model.Experience(user_id=user_id, amount=10))
+                db.execute(
+                    update(user_model.User)
+                    .where(user_model.User.id == user_id)
+                    .values(total_experience=user_model.User.total_experience + 10)
+                )
+                db.commit()
+                count("writes")
+            except OperationalError:
+                db.rollback()
+                count("errors")
+            i += 13
+        db.close()
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "reads_per_sec": round(counts["reads"] / args.seconds, 1),
+        "writes_per_sec": round(counts["writes"] / args.seconds, 1),
+        "errors": counts["errors"],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite default vs tuned connection benchmark")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "config": vars(args),
+        "sqlite_default": run(False, args),
+        "sqlite_tuned": run(True, args),
+    }, indent=2))
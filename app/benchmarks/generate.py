@@ -0,0 +1,164 @@
+"""Deterministic synthetic data set for benchmarks.
+
+Seeds departments, job groups, a level ladder, one admin, N users and M
+experience rows with bulk inserts, then materializes each user's total
+and level. The same --seed always produces the same rows, so results
+from different commits are comparable. Every account uses PASSWORD.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.generate --database-url sqlite:///./bench.db --users 100000 --experiences 10000000
+"""
+import argparse
+import bisect
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from passlib.context import CryptContext
+from sqlalchemy import bindparam, create_engine, event, insert, update
+from sqlalchemy.orm import Session
+
+from core.etc import Permission
+from db.session import Base, get_engine_options, set_sqlite_pragmas
+from db.models import admin_model, auth_model, board_model, experience_model, notification_model, quest_model, user_model, version_model
+from utils import hash, search  # search: FTS5 tables are created and dropped with their tables
+from utils.experience import rebuild_experience_rollups
+
+PASSWORD = "bench-password"
+ADMIN_USERNAME = "bench-admin"
+
+DEPARTMENTS = 20
+JOB_GROUPS = 8
+LEVELS = 30
+LEADER_RATIO = 0.1
+
+# Typical grant sizes, most grants are small
+AMOUNTS = [10, 20, 30, 50, 100, 200, 500]
+AMOUNT_WEIGHTS = [30, 25, 15, 12, 10, 6, 2]
+
+NOW = datetime(2025, 1, 1)
+HISTORY_DAYS = 5 * 365
+
+def employee_id(i: int) -> str:
+    return f"E{i:07d}"
+
+def username(i: int) -> str:
+    return f"user{i:07d}"
+
+def level_thresholds() -> list:
+    return [100 * level * level for level in range(LEVELS)]
+
+def password_hash(memory_cost: int = None) -> str:
+    """One hash shared by every account (argon2 per user would dominate seeding)."""
+    context = hash.pwd_context if memory_cost is None else hash.pwd_context.copy(argon2__memory_cost=memory_cost)
+    return context.hash(PASSWORD)
+
+def generate(database_url: str, users: int, experiences: int, seed: int, chunk_size: int,
+             rollups: bool = False, memory_cost: int = None) -> dict:
+    rng = random.Random(seed)
+    engine = create_engine(database_url, **get_engine_options(database_url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    timings = {}
+    started = time.perf_counter()
+    hashed_password = password_hash(memory_cost)
+
+    with engine.begin() as conn:
+        conn.execute(insert(user_model.Department), [{"name": f"Department {i}", "is_active": True} for i in range(DEPARTMENTS)])
+        conn.execute(insert(user_model.JobGroup), [{"name": f"Job group {i}", "is_active": True} for i in range(JOB_GROUPS)])
+        conn.execute(insert(experience_model.Level), [
+            {"name": f"Lv.{level + 1}", "total_required_experience": threshold}
+            for level, threshold in enumerate(level_thresholds())
+        ])
+        conn.execute(insert(admin_model.Admin), [{"username": ADMIN_USERNAME, "hashed_password": hashed_password, "created_at": NOW}])
+
+    # Users, in chunks (ids are assigned in insert order, starting at 1)
+    join_dates = []
+    with engine.begin() as conn:
+        for start in range(0, users, chunk_size):
+            rows = []
+            for i in range(start, min(start + chunk_size, users)):
+                join_date = NOW - timedelta(days=rng.randrange(HISTORY_DAYS))
+                join_dates.append(join_date)
+                rows.append({
+                    "employee_id": employee_id(i),
+                    "username": username(i),
+                    "name": f"User {i}",
+                    "hashed_password": hashed_password,
+                    "join_date": join_date,
+                    "permission_type": Permission.LEADER if rng.random() < LEADER_RATIO else Permission.USER,
+                    "department_id": rng.randrange(DEPARTMENTS) + 1,
+                    "job_group_id": rng.randrange(JOB_GROUPS) + 1,
+                    "total_experience": 0,
+                })
+            conn.execute(insert(user_model.User), rows)
+    timings["users_seconds"] = round(time.perf_counter() - started, 2)
+
+    # Experience ledger, granted between each user's join date and NOW
+    totals = [0] * users
+    with engine.begin() as conn:
+        for start in range(0, experiences, chunk_size):
+            rows = []
+            for _ in range(min(chunk_size, experiences - start)):
+                user = rng.randrange(users)
+                amount = rng.choices(AMOUNTS, AMOUNT_WEIGHTS)[0]
+                totals[user] += amount
+                seconds = int((NOW - join_dates[user]).total_seconds())
+                rows.append({
+                    "user_id": user + 1,
+                    "amount": amount,
+                    "created_at": join_dates[user] + timedelta(seconds=rng.randrange(max(1, seconds))),
+                })
+            conn.execute(insert(experience_model.Experience), rows)
+    timings["experiences_seconds"] = round(time.perf_counter() - started, 2)
+
+    # Materialized totals and levels
+    thresholds = level_thresholds()
+    users_table = user_model.User.__table__
+    with engine.begin() as conn:
+        for start in range(0, users, chunk_size):
+            conn.execute(
+                update(users_table)
+                .where(users_table.c.id == bindparam("b_user_id"))
+                .values(total_experience=bindparam("b_total"), level_id=bindparam("b_level_id")),
+                [
+                    {"b_user_id": user + 1, "b_total": totals[user], "b_level_id": bisect.bisect_right(thresholds, totals[user])}
+                    for user in range(start, min(start + chunk_size, users))
+                ]
+            )
+    timings["totals_seconds"] = round(time.perf_counter() - started, 2)
+
+    if rollups:
+        with Session(engine) as db:
+            rebuild_experience_rollups(db)
+            db.commit()
+        timings["rollups_seconds"] = round(time.perf_counter() - started, 2)
+
+    engine.dispose()
+    return {
+        "database_url": database_url,
+        "users": users,
+        "experiences": experiences,
+        "seed": seed,
+        "timings": timings,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic benchmark data set")
+    parser.add_argument("--database-url", required=True, help="the database is dropped and recreated")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--experiences", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--rollups", action="store_true", help="also build experience_rollups")
+    parser.add_argument("--memory-cost", type=int, default=None, help="argon2 memory cost (KiB) of the shared password hash")
+    args = parser.parse_args()
+
+    print(json.dumps(generate(
+        args.database_url, args.users, args.experiences, args.seed, args.chunk_size, args.rollups, args.memory_cost
+    ), indent=2))
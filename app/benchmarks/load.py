@@ -0,0 +1,181 @@
+"""In-process ASGI load driver.
+
+Drives the real app (with its lifespan) through httpx's ASGI transport
+against a data set made by ``benchmarks.generate``, one scenario at a
+time, and prints throughput and p50/p95/p99 latency per scenario as JSON.
+Keep the output of two commits and diff them to spot regressions.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.generate --database-url sqlite:///./bench.db --users 10000 --experiences 1000000
+    python -m benchmarks.load --database-url sqlite:///./bench.db --requests 1000 --concurrency 20 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter
+
+SCENARIOS = ["login", "refresh", "user_list", "user_detail", "experience_grant", "experience_history"]
+
+def percentiles(samples: list) -> dict:
+    samples = sorted(samples)
+    def pick(q):
+        return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3) if samples else None
+    return {
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else None,
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run_scenario(send, requests: int, concurrency: int) -> dict:
+    """Call `send(i)` for i in range(requests) from `concurrency` workers."""
+    latencies, statuses = [], Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "status_counts": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency": percentiles(latencies),
+    }
+
+async def drive(args) -> dict:
+    # Imported here: the app reads database_url when it is first imported
+    import httpx
+    import main
+    from benchmarks.generate import ADMIN_USERNAME, PASSWORD, employee_id, username
+    from utils import hash
+
+    rng = random.Random(args.seed)
+    scenarios = args.scenarios.split(",")
+    results = {}
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            response = await client.post("/api/v1/admin/auth/login", data={"username": ADMIN_USERNAME, "password": PASSWORD})
+            response.raise_for_status()
+            admin_headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Users the token-based scenarios act as, logged in up front
+            sessions = []
+            for i in rng.sample(range(args.users), min(args.sessions, args.users)):
+                response = await client.post("/api/v1/user/auth/login", data={"username": username(i), "password": PASSWORD})
+                response.raise_for_status()
+                sessions.append(response.json())
+
+            async def login(i):
+                return await client.post("/api/v1/user/auth/login", data={"username": username(i % args.users), "password": PASSWORD})
+
+            async def refresh(i):
+                session = sessions[i % len(sessions)]
+                response = await client.post("/api/v1/user/auth/refresh", headers={"Authorization": f"Bearer {session['refresh_token']}"})
+                if response.status_code == 200:
+                    session["access_token"] = response.json()["access_token"]
+                return response
+
+            cursors = {}
+            async def user_list(i):
+                # Walk the directory page by page, one walk per worker slot
+                slot = i % args.concurrency
+                params = {"limit": args.page_size}
+                if cursors.get(slot):
+                    params["cursor"] = cursors[slot]
+                response = await client.get("/api/v1/admin/user/users", params=params, headers=admin_headers)
+                if response.status_code == 200:
+                    cursors[slot] = response.json()["next_cursor"]
+                return response
+
+            detail_ids = [rng.randrange(args.users) for _ in range(args.requests)]
+            async def user_detail(i):
+                return await client.get(f"/api/v1/admin/user/user/{employee_id(detail_ids[i])}", headers=admin_headers)
+
+            grant_ids = [rng.randrange(args.users) for _ in range(args.requests)]
+            async def experience_grant(i):
+                return await client.post(
+                    "/api/v1/common/experience",
+                    json={"employee_id": employee_id(grant_ids[i]), "amount": 10},
+                    headers=admin_headers
+                )
+
+            async def experience_history(i):
+                session = sessions[i % len(sessions)]
+                return await client.get("/api/v1/user/experience", headers={"Authorization": f"Bearer {session['access_token']}"})
+
+            senders = {
+                "login": login,
+                "refresh": refresh,
+                "user_list": user_list,
+                "user_detail": user_detail,
+                "experience_grant": experience_grant,
+                "experience_history": experience_history,
+            }
+            for name in scenarios:
+                requests, concurrency = args.requests, args.concurrency
+                if name == "login":
+                    # argon2 bound: stay within the hash pool's admission limits
+                    requests = min(requests, args.login_requests)
+                    concurrency = min(concurrency, hash.pool.max_workers + hash.pool.max_queue)
+                results[name] = await run_scenario(senders[name], requests, concurrency)
+
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process ASGI load driver")
+    parser.add_argument("--database-url", required=True, help="a data set made by benchmarks.generate")
+    parser.add_argument("--users", type=int, default=100000, help="users in the data set")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="requests of the login scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=50, help="logged-in users for refresh and history")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    for scenario in args.scenarios.split(","):
+        if scenario not in SCENARIOS:
+            parser.error(f"unknown scenario {scenario!r}, choose from {', '.join(SCENARIOS)}")
+
+    # Read by core.config when the app is imported
+    os.environ["database_url"] = args.database_url
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "scenarios": asyncio.run(drive(args)),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
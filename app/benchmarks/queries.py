@@ -0,0 +1,216 @@
+"""SQL query budgets and query-plan checks per endpoint.
+
+Seeds a small data set with ``benchmarks.generate``, calls each endpoint
+below through the ASGI app and captures every SQL statement it issues.
+A check fails when an endpoint issues more statements than its budget,
+when ``EXPLAIN QUERY PLAN`` shows a full table scan or a temporary sort
+of one of WATCHED_TABLES, or when the request is not labelled with the
+expected route in the metrics. Exits non-zero on any failure, so it can gate CI.
+
+Run from the ``app`` directory:
+
+    python -m benchmarks.queries
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import NamedTuple, Optional
+
+WATCHED_TABLES = ("users", "experience", "auth_sessions", "posts", "comments", "notifications")
+
+class Check(NamedTuple):
+    name: str
+    method: str
+    path: str
+    budget: int # SQL statements per request
+    token: str = "admin" # admin, user or refresh
+    logs_in: Optional[str] = None # admin or user: later checks use the tokens it returns
+    json: Optional[dict] = None
+    data: Optional[dict] = None
+    params: Optional[dict] = None
+    route: Optional[str] = None # expected route label of the request metrics
+
+# Run in this order; the budgets assume the access tokens are already cached
+CHECKS = [
+    Check("admin login", "POST", "/api/v1/admin/auth/login", 5, token=None, logs_in="admin",
+          data={"username": "bench-admin", "password": "bench-password"}),
+    Check("user login", "POST", "/api/v1/user/auth/login", 5, token=None, logs_in="user",
+          data={"username": "user0000000", "password": "bench-password"}),
+    Check("user refresh", "POST", "/api/v1/user/auth/refresh", 5, token="refresh"),
+    # A first page walks the head of the sort index and stops at the limit
+    Check("user list", "GET", "/api/v1/admin/user/users", 1, params={"limit": 50}),
+    Check("user list by join date", "GET", "/api/v1/admin/user/users", 1, params={"limit": 50, "sort": "join_date"}),
+    Check("user search", "GET", "/api/v1/admin/user/search", 1, params={"q": "user 12"}),
+    Check("user detail", "GET", "/api/v1/admin/user/user/E0000002", 1, route="/api/v1/admin/user/user/{employee_id}"),
+    # The employee id equals static segments of the path, which must stay in the route label
+    Check("user create", "POST", "/api/v1/admin/user/user", 3, json={
+        "employee_id": "user", "username": "query-check", "name": "Query check", "password": "bench-password",
+        "join_date": "2024-01-01T00:00:00", "department_name": "Department 0", "job_group_name": "Job group 0",
+    }),
+    Check("user detail by a path-like id", "GET", "/api/v1/admin/user/user/user", 1,
+          route="/api/v1/admin/user/user/{employee_id}"),
+    Check("departments", "GET", "/api/v1/admin/departments", 1),
+    Check("job groups", "GET", "/api/v1/admin/job_groups", 1),
+    Check("levels", "GET", "/api/v1/common/levels", 0),
+    Check("experience grant", "POST", "/api/v1/common/experience", 5, json={"employee_id": "E0000003", "amount": 10}),
+    Check("experience batch grant", "POST", "/api/v1/common/experience/batch", 5, json={"items": [
+        {"employee_id": f"E{i:07d}", "amount": 10} for i in range(10, 30)
+    ]}),
+    Check("leaderboard", "GET", "/api/v1/common/leaderboard", 1, params={"limit": 10}),
+    Check("experience history", "GET", "/api/v1/user/experience", 3, token="user"),
+    Check("experience time series", "GET", "/api/v1/user/experience/timeseries", 1, token="user"),
+    Check("experience rank", "GET", "/api/v1/user/experience/rank", 0, token="user"),
+    Check("notifications", "GET", "/api/v1/user/notification", 2, token="user"),
+    Check("unread notifications", "GET", "/api/v1/user/notification", 2, token="user", params={"unread": True}),
+    Check("quests", "GET", "/api/v1/user/quest", 2, token="user"),
+    Check("board post", "POST", "/api/v1/user/board/post", 3, token="user", json={"title": "Query check", "content": "Query check"}),
+    Check("board posts", "GET", "/api/v1/user/board/posts", 2, token="user"),
+    Check("board hot posts", "GET", "/api/v1/user/board/hot", 1, token="user"),
+    Check("board comment", "POST", "/api/v1/user/board/post/1/comment", 5, token="user", json={"content": "Query check"}),
+    Check("board search", "GET", "/api/v1/user/board/search", 2, token="user", params={"q": "query"}),
+    Check("board comments", "GET", "/api/v1/user/board/post/1/comments", 3, token="user"),
+    Check("department time series", "GET", "/api/v1/admin/experience/timeseries", 1, params={"scope_id": 1}),
+]
+
+def route_requests(method: str, route: str) -> float:
+    """Requests recorded in the metrics under `route`."""
+    from utils import metrics
+    return sum(
+        sample.value
+        for metric in metrics.REQUEST_SECONDS.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count") and sample.labels["method"] == method and sample.labels["route"] == route
+    )
+
+def plan_problems(statement: str, plan_rows) -> list:
+    """Full scans and temporary sorts of WATCHED_TABLES in the EXPLAIN QUERY PLAN result of `statement`.
+
+    A scan driving an unfiltered statement in its ORDER BY up to its LIMIT
+    walks a first page instead of reading the table. A temporary sort is
+    charged to the first loop of its select, which produces the rows sorted.
+    """
+    statement = " ".join(statement.split())
+    walk = re.search(r"\bORDER BY\b.*\bLIMIT\b", statement) and not re.search(r"\bWHERE\b", statement)
+
+    # Rows are (id, parent, notused, detail); the loops and sorts of one select share a parent
+    selects = {}
+    for row in plan_rows:
+        selects.setdefault(row[1], []).append(row[-1])
+
+    problems = []
+    for details in selects.values():
+        loops = [match for match in (re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)", detail) for detail in details) if match]
+        sorts = [detail for detail in details if detail.startswith("USE TEMP B-TREE FOR")]
+        for loop in loops:
+            if loop.group(1) == "SCAN" and loop.group(2) in WATCHED_TABLES and (sorts or not walk or loop is not loops[0]):
+                problems.append(loop.string)
+        if sorts and loops and loops[0].group(2) in WATCHED_TABLES:
+            problems.extend(f"{sort} of {loops[0].group(2)}" for sort in sorts)
+    return problems
+
+async def run(args) -> dict:
+    # Imported here: the app reads its settings when it is first imported
+    import httpx
+    from sqlalchemy import create_engine, event
+    import main
+    from benchmarks import generate
+    from db.session import async_engine
+    from utils import metrics
+
+    statements = []
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # Skip background tasks, e.g. the notification writer
+        if metrics.current_request_stats() is None:
+            return
+        statements.append((statement, parameters[0] if executemany and parameters else parameters))
+
+    explain_engine = create_engine(os.environ["database_url"])
+    results = []
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://queries") as client:
+            async def warm(tokens: dict, path: str):
+                # Put the access token in the token cache, outside the captured statements
+                await client.get(path, headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+            response = await client.post("/api/v1/admin/auth/login", data={"username": generate.ADMIN_USERNAME, "password": generate.PASSWORD})
+            admin_tokens = response.json()
+            await warm(admin_tokens, "/api/v1/admin/metrics/hash")
+            response = await client.post("/api/v1/user/auth/login", data={"username": generate.username(0), "password": generate.PASSWORD})
+            user_tokens = response.json()
+            await warm(user_tokens, "/api/v1/user/experience/rank")
+
+            for check in CHECKS:
+                headers = {}
+                if check.token == "admin":
+                    headers["Authorization"] = f"Bearer {admin_tokens['access_token']}"
+                elif check.token == "user":
+                    headers["Authorization"] = f"Bearer {user_tokens['access_token']}"
+                elif check.token == "refresh":
+                    headers["Authorization"] = f"Bearer {user_tokens['refresh_token']}"
+
+                statements.clear()
+                routed = route_requests(check.method, check.route) if check.route else 0
+                response = await client.request(
+                    check.method, check.path, headers=headers, json=check.json, data=check.data, params=check.params
+                )
+                captured = list(statements)
+
+                if response.status_code == 200 and check.logs_in == "admin":
+                    admin_tokens = response.json()
+                    await warm(admin_tokens, "/api/v1/admin/metrics/hash")
+                elif response.status_code == 200 and (check.logs_in == "user" or check.token == "refresh"):
+                    user_tokens = response.json()
+                    await warm(user_tokens, "/api/v1/user/experience/rank")
+
+                failures = []
+                if response.status_code >= 400:
+                    failures.append(f"status {response.status_code}: {response.text[:200]}")
+                if len(captured) > check.budget:
+                    failures.append(f"{len(captured)} statements, budget {check.budget}")
+                if check.route and route_requests(check.method, check.route) != routed + 1:
+                    failures.append(f"not labelled {check.route} in the request metrics")
+
+                with explain_engine.connect() as conn:
+                    for statement, parameters in captured:
+                        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                            continue
+                        plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, tuple(parameters)).all()
+                        for problem in plan_problems(statement, plan):
+                            failures.append(f"{problem} in: {' '.join(statement.split())[:200]}")
+
+                results.append({
+                    "name": check.name,
+                    "statements": len(captured),
+                    "budget": check.budget,
+                    "ok": not failures,
+                    "failures": failures,
+                })
+
+    explain_engine.dispose()
+    return {"ok": all(result["ok"] for result in results), "checks": results}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-endpoint SQL query budgets and plan checks")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--experiences", type=int, default=20000)
+    args = parser.parse_args()
+
+    database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='do-queries-'), 'queries.db')}"
+    os.environ["database_url"] = database_url
+    # Keep background refreshes out of the captured statements
+    os.environ["leaderboard_refresh_interval"] = "3600"
+    os.environ["resource_version_sync_interval"] = "3600"
+
+    from benchmarks import generate
+    generate.generate(database_url, args.users, args.experiences, seed=42, chunk_size=10000, rollups=True, memory_cost=1024)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    sys.exit(0 if report["ok"] else 1)
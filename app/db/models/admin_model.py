@@ -17,16 +17,6 @@ class Admin(Base):
     created_at = Column(DateTime, default=datetime.now(KST), nullable=False) # 가입일
 
     favorites = relationship("Favorite", back_populates="admin")
-    token = relationship("AdminJwtToken", back_populates="admin")
-
-class AdminJwtToken(Base):
-    __tablename__ = "admin_jwt_tokens"
-    
-    admin_id = Column(Integer, ForeignKey("admins.id"), primary_key=True)
-    access_token = Column(String(255), nullable=False, index=True)
-    refresh_token = Column(String(255), nullable=False)
-
-    admin = relationship("Admin", back_populates="token")
 
 class Favorite(Base):
     __tablename__ = "favorites"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, LargeBinary, Index
+
+from db.session import Base
+
+class AuthSession(Base):
+    __tablename__ = "auth_sessions"
+
+    digest = Column(LargeBinary(32), primary_key=True) # 토큰의 SHA-256 다이제스트
+    kind = Column(String(10), nullable=False) # access, refresh
+    principal = Column(String(10), nullable=False) # admin, user
+    principal_id = Column(Integer, nullable=False) # admins.id 또는 users.id
+
+    __table_args__ = (
+        # Tokens of a principal, replaced on login and refresh
+        Index("ix_auth_sessions_principal", "principal", "principal_id"),
+        # SQLite: the table is stored in its primary key index, no separate rowid b-tree
+        {"sqlite_with_rowid": False},
+    )
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+
+from datetime import datetime
+
+from core.etc import KST
+from db.session import Base
+
+class Post(Base):
+    __tablename__ = "posts"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False) # 작성자
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=False) # 게시판 (작성자의 부서)
+    title = Column(String(100), nullable=False) # 제목
+    content = Column(Text, nullable=False) # 내용
+
+    comment_count = Column(Integer, default=0, nullable=False) # 댓글 수 (comments 테이블 개수)
+    like_count = Column(Integer, default=0, nullable=False) # 좋아요 수 (post_likes 테이블 개수)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False) # 작성일
+
+    comments = relationship("Comment", back_populates="post")
+
+    __table_args__ = (
+        # Keyset pagination of a department's board, and the hot feed window
+        Index("ix_posts_department_id_created_at_id", "department_id", "created_at", "id"),
+        Index("ix_posts_created_at", "created_at"),
+    )
+
+class Comment(Base):
+    __tablename__ = "comments"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False) # 작성자
+    content = Column(Text, nullable=False) # 내용
+
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False) # 작성일
+
+    post = relationship("Post", back_populates="comments")
+
+    __table_args__ = (
+        # Keyset pagination of a post's comments
+        Index("ix_comments_post_id_created_at_id", "post_id", "created_at", "id"),
+    )
+
+class PostLike(Base):
+    __tablename__ = "post_likes"
+
+    post_id = Column(Integer, ForeignKey("posts.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False)
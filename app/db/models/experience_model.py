@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, BigInteger, SmallInteger, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, BigInteger, SmallInteger, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from datetime import datetime, timezone
@@ -12,10 +12,27 @@ class Experience(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     amount = Column(BigInteger, nullable=False)  # 경험치
-    created_at = Column(DateTime, default=datetime.now(KST), nullable=False)  # 경험치를 받은 날짜
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False)  # 경험치를 받은 날짜
 
     user = relationship("User", back_populates="experiences")
 
+    __table_args__ = (Index("ix_experience_user_id_created_at", "user_id", "created_at"),)
+
+class ExperienceRollup(Base):
+    __tablename__ = "experience_rollups"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    scope = Column(String(20), nullable=False)  # "user" 또는 "department"
+    scope_id = Column(Integer, nullable=False)  # users.id 또는 departments.id
+    granularity = Column(String(10), nullable=False)  # "day", "week", "month"
+    bucket_start = Column(DateTime, nullable=False)  # 구간 시작 (KST)
+    amount = Column(BigInteger, default=0, nullable=False)  # 구간 내 경험치 합계
+    grant_count = Column(Integer, default=0, nullable=False)  # 구간 내 지급 횟수
+
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_id", "granularity", "bucket_start", name="uq_experience_rollups_bucket"),
+    )
+
 class Level(Base):
     __tablename__ = "levels"
 
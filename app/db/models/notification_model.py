@@ -0,0 +1,28 @@
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, BigInteger, DateTime, Index
+
+from datetime import datetime
+
+from core.etc import KST
+from db.session import Base
+from db.models import quest_model # quests is referenced by notifications.quest_id
+
+class Notification(Base):
+    __tablename__ = "notifications"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(20), nullable=False) # experience, level_up, quest_completed
+    amount = Column(Integer, nullable=True) # 지급된 경험치 (experience)
+    total_experience = Column(BigInteger, nullable=False) # 알림 시점의 누적 경험치
+    level_id = Column(Integer, ForeignKey("levels.id"), nullable=True) # 알림 시점의 레벨
+    quest_id = Column(Integer, ForeignKey("quests.id"), nullable=True) # 완료한 퀘스트 (quest_completed)
+    read = Column(Boolean, default=False, nullable=False) # 읽음 여부
+
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False)
+
+    __table_args__ = (
+        # Unread lists and counts of a user, newest first
+        Index("ix_notifications_user_id_read_created_at", "user_id", "read", "created_at"),
+        # Full lists of a user, newest first, paged by (created_at, id)
+        Index("ix_notifications_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
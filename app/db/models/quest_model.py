@@ -0,0 +1,45 @@
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, BigInteger, DateTime, Index
+from sqlalchemy.orm import relationship
+
+from datetime import datetime
+
+from core.etc import KST
+from db.session import Base
+
+class Quest(Base):
+    __tablename__ = "quests"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String(100), nullable=False) # 퀘스트 이름
+    description = Column(String(255), nullable=True) # 설명
+
+    condition = Column(String(20), nullable=False) # experience: 획득 경험치 합계, grant_count: 지급 횟수
+    granted_by = Column(String(10), nullable=True) # admin, leader (없으면 모든 지급)
+    target = Column(BigInteger, nullable=False) # 목표 (경험치 합계 또는 지급 횟수)
+    reward = Column(Integer, default=0, nullable=False) # 완료 보상 경험치
+
+    department_id = Column(Integer, ForeignKey("departments.id"), nullable=True) # 대상 부서 (없으면 전체)
+    job_group_id = Column(Integer, ForeignKey("job_group.id"), nullable=True) # 대상 직무 그룹 (없으면 전체)
+
+    start_at = Column(DateTime, nullable=True) # 기간 시작 (없으면 제한 없음)
+    end_at = Column(DateTime, nullable=True) # 기간 끝 (미포함, 없으면 제한 없음)
+    is_active = Column(Boolean, default=True, nullable=False)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(KST), nullable=False)
+
+    progress = relationship("QuestProgress", back_populates="quest")
+
+class QuestProgress(Base):
+    __tablename__ = "quest_progress"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    quest_id = Column(Integer, ForeignKey("quests.id"), primary_key=True)
+    progress = Column(BigInteger, default=0, nullable=False) # 진행도 (경험치 합계 또는 지급 횟수)
+    completed_at = Column(DateTime, nullable=True) # 완료 시각
+
+    quest = relationship("Quest", back_populates="progress")
+
+    __table_args__ = (
+        # Completions of a quest
+        Index("ix_quest_progress_quest_id_completed_at", "quest_id", "completed_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, BigInteger, SmallInteger, DateTime
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, BigInteger, SmallInteger, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import ENUM
 
@@ -22,14 +22,22 @@ class User(Base):
     job_group_id = Column(Integer, ForeignKey("job_group.id"), nullable=False) # 직무 그룹
     department_id = Column(Integer, ForeignKey("departments.id"), nullable=False) # 부서
 
+    total_experience = Column(BigInteger, default=0, nullable=False) # 누적 경험치 (experience 테이블 합계)
+    level_id = Column(Integer, ForeignKey("levels.id"), nullable=True) # 현재 레벨
+
     profile_url = relationship("UserProfile", back_populates="user")
-    token = relationship("UserJwtToken", back_populates="user")
     
     experiences = relationship("Experience", back_populates="user")
+    level = relationship("Level")
 
     job_group = relationship("JobGroup", back_populates="user")
     department = relationship("Department", back_populates="user")
 
+    __table_args__ = (
+        # Keyset pagination on (join_date, id); employee_id is already unique
+        Index("ix_users_join_date_id", "join_date", "id"),
+    )
+
 class Department(Base):
     __tablename__ = "departments"
 
@@ -58,14 +66,5 @@ class UserProfile(Base):
 
     user = relationship("User", back_populates="profile_url")
 
-class UserJwtToken(Base):
-    __tablename__ = "user_jwt_tokens"
-    
-    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
-    access_token = Column(String(255), nullable=False, index=True)
-    refresh_token = Column(String(255), nullable=False)
-
-    user = relationship("User", back_populates="token")
-
 
 
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, BigInteger, Integer
+
+from db.session import Base
+
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    name = Column(String(50), primary_key=True)  # 리소스 이름 (departments, job_groups, levels)
+    version = Column(BigInteger, default=0, nullable=False)  # 쓰기마다 1씩 증가
+
+class TokenVersion(Base):
+    __tablename__ = "token_versions"
+
+    principal = Column(String(10), primary_key=True)  # "admin" 또는 "user"
+    principal_id = Column(Integer, primary_key=True)  # admins.id 또는 users.id
+    version = Column(Integer, default=0, nullable=False)  # 이보다 낮은 버전의 access token은 폐기됨
+    revision = Column(BigInteger, index=True, nullable=False)  # 변경 순서 (동기화용)
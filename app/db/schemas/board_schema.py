@@ -0,0 +1,45 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from datetime import datetime
+
+class PostCreate(BaseModel):
+    title: str
+    content: str
+
+class Post(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    author: str # 작성자 이름
+    title: str
+    content: str
+    comment_count: int
+    like_count: int
+    created_at: datetime
+
+class Posts(BaseModel):
+    data: List[Post]
+    next_cursor: Optional[str] = None
+
+class HotPosts(BaseModel):
+    department_id: int
+    scored_at: Optional[datetime] = None # 점수를 계산한 시각
+    data: List[Post]
+
+class CommentCreate(BaseModel):
+    content: str
+
+class Comment(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    author: str # 작성자 이름
+    content: str
+    created_at: datetime
+
+class Comments(BaseModel):
+    data: List[Comment]
+    next_cursor: Optional[str] = None
+
+class Like(BaseModel):
+    like_count: int
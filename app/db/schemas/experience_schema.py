@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List
 from datetime import datetime
 
@@ -8,9 +8,88 @@ class ExperienceBase(BaseModel):
 class ExperienceCreate(ExperienceBase):
     employee_id: str
 
+class ExperienceBatchCreate(BaseModel):
+    items: List[ExperienceCreate]
+
+class ExperienceBatchItemResult(ExperienceCreate):
+    status: str # created, not_found, invalid_amount
+
+class ExperienceBatchResult(BaseModel):
+    created: int
+    results: List[ExperienceBatchItemResult]
+
 class Experience(ExperienceBase):
+    model_config = ConfigDict(from_attributes=True)
+
     created_at: datetime
 
 class Experiences(BaseModel):
     total_experience: int
-    data: List[Experience]
\ No newline at end of file
+    level: str
+    experience_to_next_level: Optional[int] = None
+    level_progress_percent: float
+    period_experience: int # from/to 기간 내 경험치 합계
+    data: List[Experience]
+    next_cursor: Optional[str] = None
+
+class ExperienceBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    bucket_start: datetime
+    amount: int
+    grant_count: int
+
+class ExperienceTimeseries(BaseModel):
+    granularity: str # day, week, month
+    start: datetime
+    end: datetime
+    data: List[ExperienceBucket]
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    employee_id: str
+    name: str
+    total_experience: int
+    level: str
+
+class Leaderboard(BaseModel):
+    scope: str # global, department, job_group
+    scope_id: Optional[int] = None
+    total_users: int
+    data: List[LeaderboardEntry]
+
+class Rank(BaseModel):
+    total_experience: int
+    global_rank: Optional[int] = None
+    department_rank: Optional[int] = None
+    job_group_rank: Optional[int] = None
+
+class LevelBase(BaseModel):
+    name: str
+    total_required_experience: int
+
+class LevelCreate(LevelBase):
+    pass
+
+class LevelUpdate(BaseModel):
+    name: Optional[str] = None
+    total_required_experience: Optional[int] = None
+
+class Level(LevelBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+
+class LevelTransition(BaseModel):
+    from_level: Optional[str] = None # None: 레벨 없음
+    to_level: Optional[str] = None
+    users: int
+
+class LevelRecompute(BaseModel):
+    users: int # 검사한 사용자 수
+    changed: int # 레벨이 바뀐 사용자 수 (moved_up + moved_down)
+    moved_up: int
+    moved_down: int
+    skipped: int # 재계산 중 경험치를 지급받아 지급 시 계산된 레벨을 유지한 사용자 수
+    transitions: List[LevelTransition] # 많은 순
+    elapsed_seconds: float
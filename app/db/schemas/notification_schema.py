@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from datetime import datetime
+
+class Notification(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str # experience, level_up, quest_completed
+    amount: Optional[int] = None
+    total_experience: int
+    level_id: Optional[int] = None
+    quest_id: Optional[int] = None
+    read: bool
+    created_at: datetime
+
+class Notifications(BaseModel):
+    unread_count: int
+    data: List[Notification]
+    next_cursor: Optional[str] = None
+
+class NotificationRead(BaseModel):
+    updated: int
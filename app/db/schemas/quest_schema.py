@@ -0,0 +1,39 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+from datetime import datetime
+
+class QuestBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    condition: str # experience, grant_count
+    granted_by: Optional[str] = None # admin, leader
+    target: int
+    reward: int = 0
+    department_id: Optional[int] = None
+    job_group_id: Optional[int] = None
+    start_at: Optional[datetime] = None
+    end_at: Optional[datetime] = None
+
+class QuestCreate(QuestBase):
+    pass
+
+class QuestUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    target: Optional[int] = None
+    reward: Optional[int] = None
+    end_at: Optional[datetime] = None
+    is_active: Optional[bool] = None
+
+class Quest(QuestBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    is_active: bool
+
+class UserQuest(Quest):
+    progress: int = 0
+    completed_at: Optional[datetime] = None
+
+class UserQuests(BaseModel):
+    data: List[UserQuest]
@@ -23,6 +23,12 @@ class User(BaseModel):
     department_name: str
     total_experience: int
     level: str
+    experience_to_next_level: Optional[int] = None
+    level_progress_percent: float = 0
+
+class Users(BaseModel):
+    data: List[User]
+    next_cursor: Optional[str] = None
 
 class JwtToken(BaseModel):
     access_token: str
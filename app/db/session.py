@@ -1,20 +1,64 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 
-DATABASE_URL = "sqlite:///./sql_app.db"
+from core.config import get_settings
 
-engine = create_engine(DATABASE_URL)
-connection = engine.connect()
-connection.close()
+settings = get_settings()
+
+# Async drivers for the configured database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+DATABASE_URL = settings.database_url
+ASYNC_DATABASE_URL = settings.async_database_url or get_async_database_url(DATABASE_URL)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply per-connection SQLite settings: WAL lets readers run alongside a writer."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout}")
+    cursor.execute(f"PRAGMA cache_size={settings.sqlite_cache_size}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.close()
+
+def get_engine_options(database_url: str) -> dict:
+    """Pool options from Settings, plus SQLite connect arguments."""
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if make_url(database_url).get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+# Sync engine: schema creation, management commands and background jobs
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **get_engine_options(ASYNC_DATABASE_URL))
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+if engine.dialect.name == "sqlite" and settings.sqlite_tuning:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
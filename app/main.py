@@ -1,19 +1,99 @@
 from fastapi import FastAPI
+from contextlib import asynccontextmanager
 from api.common import api_v1_router as common_api_v1_router
 from api.admin import api_v1_router as admin_api_v1_router
 from api.user import api_v1_router as user_api_v1_router
-from db.session import SessionLocal, engine
+from core.config import get_settings
+from db.session import AsyncSessionLocal, async_engine, engine
 from db.models import user_model
+from utils import jwt, level, metrics, reference, search
+from utils.board import hot_feed
+from utils.leaderboard import leaderboard
+from utils.notifications import bus
+from utils.quests import engine as quest_engine
+from utils.versions import versions
 
+import asyncio
+import traceback
 import uvicorn
 
 user_model.Base.metadata.create_all(bind=engine)
+search.ensure_search_indexes(engine)
 
-app = FastAPI()
+async def refresh_leaderboard():
+    # Pick up grants and new users from other workers
+    while True:
+        await asyncio.sleep(get_settings().leaderboard_refresh_interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await leaderboard.load(db)
+        except Exception:
+            print(traceback.format_exc())
+
+async def refresh_hot_feed():
+    # Rescore the hot posts of every department
+    while True:
+        await asyncio.sleep(get_settings().board_hot_interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await hot_feed.load(db)
+        except Exception:
+            print(traceback.format_exc())
+
+async def sync_versions():
+    # Pick up resource and token versions bumped, and notifications stored, by other workers
+    while True:
+        await asyncio.sleep(get_settings().resource_version_sync_interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                await versions.sync(db)
+                await jwt.revocations.sync(db)
+                await bus.sync(db)
+        except Exception:
+            print(traceback.format_exc())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load in-process caches
+    async with AsyncSessionLocal() as db:
+        await level.load_ladder(db)
+        await leaderboard.load(db)
+        await versions.sync(db)
+        await jwt.revocations.sync(db)
+        await reference.load_registry(db)
+        await bus.load(db)
+        await quest_engine.load(db)
+        await hot_feed.load(db)
+
+    # Start background tasks
+    tasks = [
+        asyncio.create_task(refresh_leaderboard()),
+        asyncio.create_task(sync_versions()),
+        asyncio.create_task(refresh_hot_feed()),
+        asyncio.create_task(bus.run_writer()),
+        asyncio.create_task(quest_engine.run())
+    ]
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+
+    # Process grants and store notifications still waiting for the background tasks
+    await quest_engine.flush()
+    await bus.flush()
+
+app = FastAPI(lifespan=lifespan)
+
+# Prometheus metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(engine)
+metrics.instrument_engine(async_engine.sync_engine)
+app.add_api_route("/metrics", metrics.metrics_endpoint, methods=["GET"], include_in_schema=False)
 
 app.include_router(common_api_v1_router)
 app.include_router(admin_api_v1_router)
-#app.include_router(user_api_v1_router)
+app.include_router(user_api_v1_router)
 
 if __name__ == "__main__":
     # For Production Build
@@ -21,4 +101,3 @@ if __name__ == "__main__":
 
     # For Development Build
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
-
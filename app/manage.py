@@ -0,0 +1,76 @@
+import argparse
+
+from db.session import SessionLocal
+from db.models import user_model, experience_model
+
+from utils import experience, level, search
+
+def rebuild_experience_totals():
+    """Rebuild users.total_experience and users.level_id from the experience table."""
+    db = SessionLocal()
+    try:
+        updated = experience.rebuild_experience_totals(db)
+        db.commit()
+        print(f"Rebuilt total experience for {updated} users")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def rebuild_experience_rollups():
+    """Rebuild the day/week/month experience rollups from the experience table."""
+    db = SessionLocal()
+    try:
+        written = experience.rebuild_experience_rollups(db)
+        db.commit()
+        print(f"Rebuilt {written} experience rollup buckets")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def recompute_levels():
+    """Re-derive every user's level from the levels table, e.g. after thresholds were rebalanced."""
+    db = SessionLocal()
+    try:
+        summary = level.recompute_levels(db)
+        print(f"Recomputed levels of {summary.users} users in {summary.elapsed_seconds}s: "
+              f"{summary.moved_up} up, {summary.moved_down} down, {summary.skipped} skipped")
+        for transition in summary.transitions:
+            print(f"  {transition.from_level or '-'} -> {transition.to_level or '-'}: {transition.users}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def rebuild_search_index():
+    """Rebuild the full-text search indexes of users and board posts."""
+    db = SessionLocal()
+    try:
+        if not search.rebuild_search_indexes(db):
+            print("Full-text search indexes are only kept on SQLite")
+            return
+        db.commit()
+        print("Rebuilt the full-text search indexes")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+COMMANDS = {
+    "rebuild-experience-totals": rebuild_experience_totals,
+    "rebuild-experience-rollups": rebuild_experience_rollups,
+    "recompute-levels": recompute_levels,
+    "rebuild-search-index": rebuild_search_index,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="do. backend management commands")
+    parser.add_argument("command", choices=COMMANDS.keys())
+    args = parser.parse_args()
+
+    COMMANDS[args.command]()
@@ -0,0 +1,82 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+
+from core.config import get_settings
+from core.etc import KST
+
+from db.schemas import board_schema
+from db.models import user_model, board_model
+
+from utils.experience import to_kst
+
+# Exponent of the age decay; higher values favour newer posts
+GRAVITY = 1.5
+
+def post_query():
+    """Posts with their author's name, the columns of board_schema.Post."""
+    posts = board_model.Post
+    return (
+        select(
+            posts.id, user_model.User.name.label("author"), posts.title, posts.content,
+            posts.comment_count, posts.like_count, posts.created_at
+        )
+        .join(user_model.User, user_model.User.id == posts.user_id)
+    )
+
+def hot_score(like_count: int, comment_count: int, created_at: datetime, now: datetime) -> float:
+    """Engagement decayed by age in hours, Hacker News style. Comments weigh twice a like."""
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return (1 + like_count + 2 * comment_count) / (age_hours + 2) ** GRAVITY
+
+async def department_of(db: AsyncSession, user_id: int) -> Optional[int]:
+    """The user's current department, read from the users table so that a move takes effect at once."""
+    return await db.scalar(select(user_model.User.department_id).where(user_model.User.id == user_id))
+
+class HotFeed():
+    """Hot posts of each department, scored periodically and served from memory.
+
+    Scores use the denormalized like and comment counters of the posts in
+    the scoring window, so neither scoring nor serving aggregates likes or
+    comments. Counters in the feed are as of the last scoring.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.feeds: Dict[int, List[board_schema.Post]] = {}
+        self.scored_at: Optional[datetime] = None
+
+    def get(self, department_id: int, limit: int) -> List[board_schema.Post]:
+        with self.lock:
+            return self.feeds.get(department_id, [])[:limit]
+
+    async def load(self, db: AsyncSession):
+        """Score the posts of the window and keep the top ones of each department."""
+        settings = get_settings()
+        now = to_kst(datetime.now(KST))
+        rows = (await db.execute(
+            post_query()
+            .add_columns(board_model.Post.department_id)
+            .where(board_model.Post.created_at >= now - timedelta(hours=settings.board_hot_window))
+        )).all()
+
+        scored = defaultdict(list)
+        for row in rows:
+            scored[row.department_id].append((hot_score(row.like_count, row.comment_count, row.created_at, now), row.id, row))
+
+        feeds = {
+            department_id: [
+                board_schema.Post.model_validate(row)
+                for _, _, row in heapq.nlargest(settings.board_hot_size, entries, key=lambda entry: entry[:2])
+            ]
+            for department_id, entries in scored.items()
+        }
+        with self.lock:
+            self.feeds = feeds
+            self.scored_at = now
+
+hot_feed = HotFeed()
@@ -0,0 +1,278 @@
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from datetime import datetime, timedelta
+from collections import defaultdict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from core.etc import KST
+
+from db.models import user_model, experience_model
+
+from utils.level import get_ladder
+from utils.leaderboard import leaderboard
+from utils.notifications import NotificationEvent, bus
+
+class GrantedExperience(NamedTuple):
+    user_id: int
+    department_id: int
+    job_group_id: int
+    amount: int
+    total_experience: int
+    level_id: Optional[int]
+    previous_level_id: Optional[int]
+    grant_count: int = 1
+
+# Called with (results, granted_by) once a grant transaction has committed, e.g. by the quest engine
+grant_listeners: List[Callable[[List[GrantedExperience], Optional[str]], None]] = []
+
+GRANULARITIES = ("day", "week", "month")
+
+# Range returned when the client does not ask for one
+DEFAULT_SPANS = {"day": timedelta(days=30), "week": timedelta(weeks=52), "month": timedelta(days=365)}
+
+def to_kst(moment: datetime) -> datetime:
+    """Naive KST, the way datetimes are stored."""
+    return moment.astimezone(KST).replace(tzinfo=None) if moment.tzinfo else moment
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the day, week (Monday) or month containing `moment`, as naive KST."""
+    day = to_kst(moment).replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+async def add_rollups(db: AsyncSession, moment: datetime, amounts: List[Tuple[str, int, int, int]]):
+    """Add (scope, scope_id, amount, grant_count) to the day/week/month buckets of `moment`."""
+    rollups = experience_model.ExperienceRollup.__table__
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+
+    stmt = dialect.insert(rollups)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[rollups.c.scope, rollups.c.scope_id, rollups.c.granularity, rollups.c.bucket_start],
+        set_={
+            "amount": rollups.c.amount + stmt.excluded.amount,
+            "grant_count": rollups.c.grant_count + stmt.excluded.grant_count,
+        }
+    )
+    await db.execute(stmt, [
+        {
+            "scope": scope,
+            "scope_id": scope_id,
+            "granularity": granularity,
+            "bucket_start": bucket_start(moment, granularity),
+            "amount": amount,
+            "grant_count": grant_count,
+        }
+        for scope, scope_id, amount, grant_count in amounts
+        for granularity in GRANULARITIES
+    ])
+
+def timeseries_range(granularity: str, start: Optional[datetime], end: Optional[datetime]) -> Tuple[datetime, datetime]:
+    """Fill in a missing start or end of a time-series range, as naive KST."""
+    end = to_kst(end) if end else datetime.now(KST).replace(tzinfo=None)
+    start = to_kst(start) if start else end - DEFAULT_SPANS[granularity]
+    return start, end
+
+async def get_timeseries(
+    db: AsyncSession,
+    scope: str,
+    scope_id: int,
+    granularity: str,
+    start: datetime,
+    end: datetime
+) -> List[experience_model.ExperienceRollup]:
+    """Rollup buckets of a user or department starting in [start, end), oldest first."""
+    rollups = experience_model.ExperienceRollup
+    return (await db.execute(
+        select(rollups)
+        .where(
+            rollups.scope == scope,
+            rollups.scope_id == scope_id,
+            rollups.granularity == granularity,
+            rollups.bucket_start >= bucket_start(start, granularity),
+            rollups.bucket_start < to_kst(end)
+        )
+        .order_by(rollups.bucket_start)
+    )).scalars().all()
+
+async def add_experiences(db: AsyncSession, grants: List[Tuple[int, int]]) -> List[GrantedExperience]:
+    """Insert experience rows for (user_id, amount) pairs and update each user's total and level.
+
+    Rows are inserted and totals incremented with one executemany each, so
+    the cost per grant stays flat for large batches. Day/week/month rollups
+    per user and per department are upserted in the same statement. The caller owns the
+    transaction, so the ledger rows and the materialized totals are committed
+    (or rolled back) together. Returns one result per user.
+    """
+    if not grants:
+        return []
+
+    now = datetime.now(KST)
+    await db.execute(
+        insert(experience_model.Experience),
+        [{"user_id": user_id, "amount": amount, "created_at": now} for user_id, amount in grants]
+    )
+
+    # Increment in SQL so concurrent grants to the same user do not lose updates
+    amounts = defaultdict(int)
+    counts = defaultdict(int)
+    for user_id, amount in grants:
+        amounts[user_id] += amount
+        counts[user_id] += 1
+
+    users = user_model.User.__table__
+    await db.execute(
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"))
+        .values(total_experience=users.c.total_experience + bindparam("b_amount")),
+        [{"b_user_id": user_id, "b_amount": amount} for user_id, amount in amounts.items()]
+    )
+
+    rows = (await db.execute(
+        select(users.c.id, users.c.department_id, users.c.job_group_id, users.c.total_experience, users.c.level_id)
+        .where(users.c.id.in_(amounts.keys()))
+    )).all()
+
+    # Resolve levels in-process and write only the ones that changed
+    ladder = await get_ladder(db)
+    results = []
+    for user_id, department_id, job_group_id, total_experience, previous_level_id in rows:
+        level = ladder.resolve(total_experience)
+        results.append(GrantedExperience(
+            user_id=user_id,
+            department_id=department_id,
+            job_group_id=job_group_id,
+            amount=amounts[user_id],
+            total_experience=total_experience,
+            level_id=level.id if level else None,
+            previous_level_id=previous_level_id,
+            grant_count=counts[user_id]
+        ))
+
+    # Time-bucketed rollups for charts
+    department_amounts = defaultdict(lambda: [0, 0])
+    for result in results:
+        department_amounts[result.department_id][0] += result.amount
+        department_amounts[result.department_id][1] += result.grant_count
+    await add_rollups(db, now, [
+        *(("user", r.user_id, r.amount, r.grant_count) for r in results),
+        *(("department", department_id, amount, count) for department_id, (amount, count) in department_amounts.items()),
+    ])
+
+    changed = [{"b_user_id": r.user_id, "b_level_id": r.level_id} for r in results if r.level_id != r.previous_level_id]
+    if changed:
+        await db.execute(
+            update(users).where(users.c.id == bindparam("b_user_id")).values(level_id=bindparam("b_level_id")),
+            changed
+        )
+
+    return results
+
+def publish_grants(results: List[GrantedExperience], granted_by: Optional[str] = None):
+    """Update in-process views and queue notifications after the grant transaction has been committed.
+
+    `granted_by` is admin, leader or quest (a quest reward).
+    """
+    now = datetime.now(KST)
+    events = []
+    for result in results:
+        leaderboard.update(result.user_id, result.department_id, result.job_group_id, result.total_experience)
+
+        events.append(NotificationEvent(
+            result.user_id, "experience", result.amount, result.total_experience, result.level_id, now
+        ))
+        if result.level_id is not None and result.level_id != result.previous_level_id:
+            events.append(NotificationEvent(
+                result.user_id, "level_up", None, result.total_experience, result.level_id, now
+            ))
+    bus.publish(events)
+
+    for listener in grant_listeners:
+        listener(results, granted_by)
+
+def rebuild_experience_rollups(db: Session) -> int:
+    """Rebuild every rollup bucket from the experience table.
+
+    Streams the ledger ordered by time and writes each granularity's
+    buckets as soon as its period is over, so memory stays bounded by one
+    open day, week and month of grants.
+    Returns the number of buckets written. The caller owns the transaction.
+    """
+    rollups = experience_model.ExperienceRollup.__table__
+    db.execute(rollups.delete())
+
+    departments = dict(db.execute(select(user_model.User.id, user_model.User.department_id)).all())
+    # granularity -> (bucket_start, {(scope, scope_id): [amount, grant_count]}) of the open period
+    open_buckets = {granularity: (None, defaultdict(lambda: [0, 0])) for granularity in GRANULARITIES}
+    written = 0
+
+    def flush(granularity: str):
+        nonlocal written
+        period, totals = open_buckets[granularity]
+        if totals:
+            db.execute(insert(rollups), [
+                {"scope": scope, "scope_id": scope_id, "granularity": granularity, "bucket_start": period,
+                 "amount": amount, "grant_count": grant_count}
+                for (scope, scope_id), (amount, grant_count) in totals.items()
+            ])
+            written += len(totals)
+
+    current_day = None
+    current_totals = []
+    for user_id, amount, created_at in db.execute(
+        select(experience_model.Experience.user_id, experience_model.Experience.amount, experience_model.Experience.created_at)
+        .order_by(experience_model.Experience.created_at)
+        .execution_options(yield_per=1000)
+    ):
+        day = bucket_start(created_at, "day")
+        if day != current_day:
+            # Close the periods that ended and look up the open ones once per day
+            current_day = day
+            current_totals = []
+            for granularity in GRANULARITIES:
+                period = bucket_start(day, granularity)
+                if open_buckets[granularity][0] != period:
+                    flush(granularity)
+                    open_buckets[granularity] = (period, defaultdict(lambda: [0, 0]))
+                current_totals.append(open_buckets[granularity][1])
+
+        department_id = departments.get(user_id)
+        for totals in current_totals:
+            bucket = totals[("user", user_id)]
+            bucket[0] += amount
+            bucket[1] += 1
+            if department_id is not None:
+                bucket = totals[("department", department_id)]
+                bucket[0] += amount
+                bucket[1] += 1
+
+    for granularity in GRANULARITIES:
+        flush(granularity)
+    return written
+
+def rebuild_experience_totals(db: Session) -> int:
+    """Rebuild every user's total experience and level from the experience table.
+
+    Returns the number of users updated. The caller owns the transaction.
+    """
+    total_subquery = (
+        select(func.coalesce(func.sum(experience_model.Experience.amount), 0))
+        .where(experience_model.Experience.user_id == user_model.User.id)
+        .scalar_subquery()
+    )
+    db.execute(update(user_model.User).values(total_experience=total_subquery))
+
+    level_subquery = (
+        select(experience_model.Level.id)
+        .where(experience_model.Level.total_required_experience <= user_model.User.total_experience)
+        .order_by(experience_model.Level.total_required_experience.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    result = db.execute(update(user_model.User).values(level_id=level_subquery))
+
+    return result.rowcount
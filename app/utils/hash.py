@@ -1,5 +1,14 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
+from core.config import get_settings
+
+from utils import metrics
+
 # Argon2를 사용한 CryptContext 설정
 pwd_context = CryptContext(
     schemes=["argon2"],
@@ -17,3 +26,102 @@ def verify_hashed_text(plain_password: str, hashed_text: str):
 def hash_text(plain_text: str):
     """Hash the plain text."""
     return pwd_context.hash(plain_text)
+
+class HashPool():
+    """Bounded thread pool for argon2 with admission control.
+
+    At most `max_workers` hashes run at once (each one allocates
+    memory_cost of RAM), at most `max_queue` callers wait for a slot, and a
+    caller that waits longer than `queue_timeout` seconds is rejected with
+    503 instead of piling up. argon2 releases the GIL, so threads are enough
+    to keep the event loop free.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, queue_timeout: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="argon2")
+        self.semaphore = asyncio.Semaphore(max_workers)
+
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latencies = deque(maxlen=1024) # seconds, most recent hashes
+
+    def _reject(self):
+        self.rejected += 1
+        metrics.HASH_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again later",
+            headers={"Retry-After": str(max(1, int(self.queue_timeout)))}
+        )
+
+    async def run(self, func, *args, queue_timeout: float = None):
+        """Run `func(*args)` in the pool.
+
+        Request handlers use the defaults. Batch jobs pass their own
+        queue_timeout (0 waits without limit) and skip the queue length check.
+        """
+        if self.waiting >= self.max_queue and queue_timeout is None:
+            self._reject()
+
+        timeout = self.queue_timeout if queue_timeout is None else queue_timeout
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            self._reject()
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.running -= 1
+            self.completed += 1
+            self.latency_sum += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            self.latencies.append(elapsed)
+            metrics.HASH_SECONDS.observe(elapsed)
+            self.semaphore.release()
+
+    def stats(self) -> dict:
+        """Queue depth and hash latency (seconds) of this process."""
+        latencies = sorted(self.latencies)
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_avg": self.latency_sum / self.completed if self.completed else 0.0,
+            "latency_p50": percentile(0.50),
+            "latency_p99": percentile(0.99),
+            "latency_max": self.latency_max,
+        }
+
+settings = get_settings()
+pool = HashPool(settings.hash_max_workers, settings.hash_max_queue, settings.hash_queue_timeout)
+metrics.HASH_QUEUE_DEPTH.set_function(lambda: pool.waiting)
+metrics.HASH_RUNNING.set_function(lambda: pool.running)
+
+async def verify_hashed_text_async(plain_password: str, hashed_text: str):
+    """Verify the hashed text with the plain password in the hash pool."""
+    return await pool.run(verify_hashed_text, plain_password, hashed_text)
+
+async def hash_text_async(plain_text: str):
+    """Hash the plain text in the hash pool."""
+    return await pool.run(hash_text, plain_text)
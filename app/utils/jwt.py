@@ -1,13 +1,24 @@
 from fastapi import HTTPException, Depends
+from sqlalchemy import event, insert, select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
 from jose import jwt, JWTError, ExpiredSignatureError
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+
+import hashlib
+import threading
+import time
+import uuid
 
 from core.etc import KST, Permission
 from core.config import get_settings
 
-from db.models import user_model, admin_model
+from db.models import auth_model, version_model
+
+from utils.versions import versions
 
 # Enccode
 def encode_token(
@@ -15,18 +26,22 @@ def encode_token(
     user_id: int,
     secret_key: str,
     expries_delta: timedelta = None,
-    permission: Permission = Permission.USER
+    permission: Permission = Permission.USER,
+    token_version: int = 0
     ) -> str:
     
     current_utc_time = datetime.now(KST)
     expire = current_utc_time + expries_delta if expries_delta else current_utc_time + timedelta(minutes=1)
-    payload = { "sub": subject, "uid": user_id, "perm": permission.value, "iat": current_utc_time, "exp": expire }
+    payload = {
+        "sub": subject, "uid": user_id, "perm": permission.value, "iat": current_utc_time, "exp": expire,
+        "jti": uuid.uuid4().hex, "ver": token_version
+    }
     
     # Return JWT token
     return jwt.encode(payload, secret_key, algorithm="HS256")
 
-def create_access_token(subject: str, user_id: int, permission: Permission = Permission.USER) -> str:
-    return encode_token(subject, user_id, get_settings().access_secret_key, timedelta(days=7), permission)
+def create_access_token(subject: str, user_id: int, permission: Permission = Permission.USER, token_version: int = 0) -> str:
+    return encode_token(subject, user_id, get_settings().access_secret_key, timedelta(days=7), permission, token_version)
 
 def create_refresh_token(subject: str, user_id: int, permission: Permission = Permission.USER) -> str:
     return encode_token(subject, user_id, get_settings().refresh_secret_key, timedelta(days=30), permission)
@@ -40,41 +55,212 @@ def decode_token(token: str, secret_key: str) -> dict:
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def user_decode_access_token(db: Session, token: str) -> dict:
-    if not db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.access_token == token).first():
+def token_digest(token: str) -> bytes:
+    """SHA-256 of a token, the form tokens are stored and cached in."""
+    return hashlib.sha256(token.encode()).digest()
+
+# Access token cache
+class TokenCache():
+    """LRU cache of validated access tokens: token digest -> (principal, payload).
+
+    Entries expire at the token's `exp` or after `ttl` seconds, whichever is
+    first. The TTL bounds how long another worker may keep accepting a token
+    that was replaced by a new login or refresh.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, digest: bytes) -> Optional[Tuple[str, dict]]:
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None:
+                return None
+
+            principal, payload, expires_at = entry
+            if expires_at <= time.time():
+                del self.entries[digest]
+                return None
+
+            self.entries.move_to_end(digest)
+            return principal, payload
+
+    def set(self, digest: bytes, principal: str, payload: dict):
+        expires_at = min(payload.get("exp", 0), time.time() + self.ttl)
+        with self.lock:
+            self.entries[digest] = (principal, payload, expires_at)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, digest: Optional[bytes]):
+        with self.lock:
+            self.entries.pop(digest, None)
+
+token_cache = TokenCache(get_settings().token_cache_size, get_settings().token_cache_ttl)
+
+# Token versions
+class TokenRevocations():
+    """Current token version of each principal that ever got a token.
+
+    Issuing an access token bumps the principal's version, so every older
+    access token of that principal is revoked. The map is a copy of the
+    token_versions table, updated when this worker's own bumps commit and
+    synced incrementally (by revision) from the other workers' ones.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.versions: Dict[Tuple[str, int], int] = {}
+        self.revision = 0
+
+    def get(self, principal: str, principal_id: int) -> int:
+        return self.versions.get((principal, principal_id), 0)
+
+    def set(self, principal: str, principal_id: int, version: int):
+        with self.lock:
+            key = (principal, principal_id)
+            if version > self.versions.get(key, 0):
+                self.versions[key] = version
+
+    async def bump(self, db: AsyncSession, principal: str, principal_id: int) -> int:
+        """Increment the principal's version in the caller's transaction and return it."""
+        table = version_model.TokenVersion.__table__
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+
+        # Revisions are handed out by a counter row, which also orders concurrent bumps
+        revision = await versions.bump(db, "token_versions")
+        stmt = dialect.insert(table).values(principal=principal, principal_id=principal_id, version=1, revision=revision)
+        version = await db.scalar(stmt.on_conflict_do_update(
+            index_elements=[table.c.principal, table.c.principal_id],
+            set_={"version": table.c.version + 1, "revision": revision}
+        ).returning(table.c.version))
+        db.sync_session.info.setdefault("bumped_token_versions", []).append((principal, principal_id, version))
+        return version
+
+    async def sync(self, db: AsyncSession):
+        """Pick up token versions bumped since the last sync."""
+        table = version_model.TokenVersion.__table__
+        rows = (await db.execute(
+            select(table.c.principal, table.c.principal_id, table.c.version, table.c.revision)
+            .where(table.c.revision > self.revision)
+        )).all()
+        for principal, principal_id, version, revision in rows:
+            self.set(principal, principal_id, version)
+            self.revision = max(self.revision, revision)
+
+revocations = TokenRevocations()
+
+@event.listens_for(Session, "after_commit")
+def publish_token_versions(session: Session):
+    for principal, principal_id, version in session.info.pop("bumped_token_versions", []):
+        revocations.set(principal, principal_id, version)
+
+@event.listens_for(Session, "after_rollback")
+def discard_token_versions(session: Session):
+    session.info.pop("bumped_token_versions", None)
+
+async def issue_access_token(db: AsyncSession, principal: str, user_id: int, permission: Permission) -> str:
+    """Create an access token that revokes the principal's earlier ones once the transaction commits."""
+    return create_access_token("access", user_id, permission, await revocations.bump(db, principal, user_id))
+
+# Principal of each permission, for tokens validated without the database
+PERMISSION_PRINCIPALS = {
+    Permission.ADMIN.value: "admin",
+    Permission.LEADER.value: "user",
+    Permission.USER.value: "user",
+}
+
+# Stored tokens
+async def store_tokens(db: AsyncSession, principal: str, principal_id: int, access_token: str, refresh_token: str = None):
+    """Replace the principal's stored access token, and its refresh token when one is given.
+
+    The replaced access token stops being accepted, including from this
+    worker's token cache. The caller owns the transaction.
+    """
+    sessions = auth_model.AuthSession.__table__
+    tokens = {"access": access_token}
+    if refresh_token:
+        tokens["refresh"] = refresh_token
+
+    replaced = (await db.execute(
+        sessions.delete()
+        .where(sessions.c.principal == principal, sessions.c.principal_id == principal_id, sessions.c.kind.in_(tokens))
+        .returning(sessions.c.digest)
+    )).scalars().all()
+    for digest in replaced:
+        token_cache.invalidate(digest)
+
+    await db.execute(insert(sessions), [
+        {"digest": token_digest(token), "kind": kind, "principal": principal, "principal_id": principal_id}
+        for kind, token in tokens.items()
+    ])
+
+async def stored_principal(db: AsyncSession, digest: bytes, kind: str) -> Optional[str]:
+    """Principal (admin or user) a stored token belongs to, None if it is not stored."""
+    sessions = auth_model.AuthSession.__table__
+    return await db.scalar(select(sessions.c.principal).where(sessions.c.digest == digest, sessions.c.kind == kind))
+
+async def verify_access_token(db: AsyncSession, token: str, principals: Tuple[str, ...]) -> dict:
+    """Check that the access token is the stored token of one of `principals` and decode it.
+
+    One primary-key lookup on auth_sessions, whichever principals are accepted.
+    """
+    if get_settings().stateless_access_tokens:
+        # Signature, expiry and token version; no database read
+        payload = decode_token(token, get_settings().access_secret_key)
+        principal = PERMISSION_PRINCIPALS.get(payload.get("perm"))
+        if principal not in principals or payload.get("ver", 0) < revocations.get(principal, payload.get("uid")):
+            raise HTTPException(status_code=401, detail="Invalid token")
+        return payload
+
+    digest = token_digest(token)
+    cached = token_cache.get(digest)
+    if cached and cached[0] in principals:
+        return cached[1]
+
+    principal = await stored_principal(db, digest, "access")
+    if principal not in principals:
         raise HTTPException(status_code=401, detail="Invalid token")
-    
-    # verification permission
+
     payload = decode_token(token, get_settings().access_secret_key)
+    token_cache.set(digest, principal, payload)
+    return payload
+
+async def user_decode_access_token(db: AsyncSession, token: str) -> dict:
+    payload = await verify_access_token(db, token, ("user",))
+
+    # verification permission
     if payload.get("perm") != Permission.USER.value:
         raise HTTPException(status_code=403, detail="Permission denied")
     
     return payload
 
-def user_decode_refresh_token(db: Session, token: str) -> dict:
-    if not db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.refresh_token == token).first():
+async def user_decode_refresh_token(db: AsyncSession, token: str) -> dict:
+    if await stored_principal(db, token_digest(token), "refresh") != "user":
         raise HTTPException(status_code=401, detail="Invalid token")
     
     # verification permission
     payload = decode_token(token, get_settings().refresh_secret_key)
-    if payload.get("perm") != Permission.USER.value:
+    if payload.get("perm") not in {Permission.LEADER.value, Permission.USER.value}:
         raise HTTPException(status_code=403, detail="Permission denied")
     
     return payload
 
-def admin_decode_access_token(db: Session, token: str) -> dict:
-    if not db.query(admin_model.AdminJwtToken).filter(admin_model.AdminJwtToken.access_token == token).first():
-        raise HTTPException(status_code=401, detail="Invalid token")
+async def admin_decode_access_token(db: AsyncSession, token: str) -> dict:
+    payload = await verify_access_token(db, token, ("admin",))
 
     # verification permission
-    payload = decode_token(token, get_settings().access_secret_key)
     if payload.get("perm") != Permission.ADMIN.value:
         raise HTTPException(status_code=403, detail="Permission denied")
     
     return payload
 
-def admin_decode_refresh_token(db: Session, token: str) -> dict:
-    if not db.query(admin_model.AdminJwtToken).filter(admin_model.AdminJwtToken.refresh_token == token).first():
+async def admin_decode_refresh_token(db: AsyncSession, token: str) -> dict:
+    if await stored_principal(db, token_digest(token), "refresh") != "admin":
         raise HTTPException(status_code=401, detail="Invalid token")
 
     # verification permission
@@ -84,32 +270,23 @@ def admin_decode_refresh_token(db: Session, token: str) -> dict:
     
     return payload
 
-def admin_leader_decode_access_token(db: Session, token: str) -> dict:
-    if not db.query(admin_model.AdminJwtToken).filter(admin_model.AdminJwtToken.access_token == token).first():
-        if not db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.access_token == token).first():
-            raise HTTPException(status_code=401, detail="Invalid token")
+async def admin_leader_decode_access_token(db: AsyncSession, token: str) -> dict:
+    payload = await verify_access_token(db, token, ("admin", "user"))
 
     # verification permission
-    payload = decode_token(token, get_settings().access_secret_key)
     if payload.get("perm") not in {Permission.LEADER.value, Permission.ADMIN.value}:
         raise HTTPException(status_code=403, detail="Permission denied")
     
     return payload
 
-def all_decode_access_token(db: Session, token: str) -> dict:
-    if not db.query(admin_model.AdminJwtToken).filter(admin_model.AdminJwtToken.access_token == token).first():
-        if not db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.access_token == token).first():
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-    return decode_token(token, get_settings().access_secret_key)
+async def all_decode_access_token(db: AsyncSession, token: str) -> dict:
+    return await verify_access_token(db, token, ("admin", "user"))
 
-def user_leader_decode_access_token(db: Session, token: str) -> dict:
-    if not db.query(user_model.UserJwtToken).filter(user_model.UserJwtToken.access_token == token).first():
-        raise HTTPException(status_code=401, detail="Invalid token")
+async def user_leader_decode_access_token(db: AsyncSession, token: str) -> dict:
+    payload = await verify_access_token(db, token, ("user",))
 
     # verification permission
-    payload = decode_token(token, get_settings().access_secret_key)
     if payload.get("perm") not in {Permission.LEADER.value, Permission.USER.value}:
         raise HTTPException(status_code=403, detail="Permission denied")
     
-    return payload
\ No newline at end of file
+    return payload
@@ -0,0 +1,154 @@
+import bisect
+import threading
+import time
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+
+from db.models import user_model
+
+class RankedSet():
+    """Users ordered by total experience (highest first), ties broken by user id.
+
+    Keys are kept in a sorted list of (-total, user_id), so rank and top-N
+    lookups are a binary search and a slice. Updating a score is a binary
+    search plus a list insert/delete (a memmove, cheap at 100k entries).
+    """
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int]] = []
+        self.totals: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, user_id: int, total: int):
+        """Set the user's total; totals only grow, so a smaller one (a late update) is ignored."""
+        previous = self.totals.get(user_id)
+        if previous is not None and previous >= total:
+            return
+        if previous is not None:
+            del self.keys[bisect.bisect_left(self.keys, (-previous, user_id))]
+        bisect.insort(self.keys, (-total, user_id))
+        self.totals[user_id] = total
+
+    def remove(self, user_id: int):
+        previous = self.totals.pop(user_id, None)
+        if previous is not None:
+            del self.keys[bisect.bisect_left(self.keys, (-previous, user_id))]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank; users with the same total share a rank."""
+        total = self.totals.get(user_id)
+        if total is None:
+            return None
+        return bisect.bisect_left(self.keys, (-total,)) + 1
+
+    def top(self, limit: int) -> List[Tuple[int, int, int]]:
+        """(rank, user_id, total) of the first `limit` users."""
+        entries = []
+        for negative_total, user_id in self.keys[:limit]:
+            entries.append((bisect.bisect_left(self.keys, (negative_total,)) + 1, user_id, -negative_total))
+        return entries
+
+class Leaderboard():
+    """Company-wide, per-department and per-job-group rankings.
+
+    Built from users.total_experience (never from the experience table) and
+    updated in place after each committed experience grant. Grants published
+    concurrently may arrive out of order, so a user's total only grows.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recorded: Optional[Dict[int, Tuple[int, int, int]]] = None # updates published during load()
+        self.clear()
+
+    def clear(self):
+        self.global_ranking = RankedSet()
+        self.departments: Dict[int, RankedSet] = {}
+        self.job_groups: Dict[int, RankedSet] = {}
+        self.members: Dict[int, Tuple[int, int]] = {} # user_id -> (department_id, job_group_id)
+        self.loaded_at = time.monotonic()
+
+    def update(self, user_id: int, department_id: int, job_group_id: int, total: int):
+        with self.lock:
+            total = max(total, self.global_ranking.totals.get(user_id, total))
+            if self.recorded is not None:
+                self.recorded[user_id] = (department_id, job_group_id, total)
+
+            previous = self.members.get(user_id)
+            if previous and previous != (department_id, job_group_id):
+                self.departments[previous[0]].remove(user_id)
+                self.job_groups[previous[1]].remove(user_id)
+
+            self.members[user_id] = (department_id, job_group_id)
+            self.global_ranking.update(user_id, total)
+            self.departments.setdefault(department_id, RankedSet()).update(user_id, total)
+            self.job_groups.setdefault(job_group_id, RankedSet()).update(user_id, total)
+
+    def scope(self, scope: str, scope_id: Optional[int] = None) -> RankedSet:
+        if scope == "department":
+            return self.departments.get(scope_id) or RankedSet()
+        if scope == "job_group":
+            return self.job_groups.get(scope_id) or RankedSet()
+        return self.global_ranking
+
+    def ranks(self, user_id: int) -> Dict[str, Optional[int]]:
+        """The user's rank in each scope."""
+        with self.lock:
+            member = self.members.get(user_id)
+            if not member:
+                return {"global": None, "department": None, "job_group": None}
+            return {
+                "global": self.global_ranking.rank(user_id),
+                "department": self.departments[member[0]].rank(user_id),
+                "job_group": self.job_groups[member[1]].rank(user_id),
+            }
+
+    def top(self, scope: str, scope_id: Optional[int], limit: int) -> Tuple[int, List[Tuple[int, int, int]]]:
+        """(number of ranked users, top entries) of a scope."""
+        with self.lock:
+            ranked = self.scope(scope, scope_id)
+            return len(ranked), ranked.top(limit)
+
+    async def load(self, db: AsyncSession):
+        """Rebuild every ranking from the users table.
+
+        Updates published while the users are read are recorded and applied
+        on top of the rows read, keeping the larger total, so a rebuild does
+        not roll back a grant committed after the read.
+        """
+        with self.lock:
+            self.recorded = {}
+        try:
+            rows = (await db.execute(select(
+                user_model.User.id,
+                user_model.User.department_id,
+                user_model.User.job_group_id,
+                user_model.User.total_experience
+            ))).all()
+        except Exception:
+            with self.lock:
+                self.recorded = None
+            raise
+
+        with self.lock:
+            recorded, self.recorded = self.recorded, None
+            users = {user_id: (department_id, job_group_id, total) for user_id, department_id, job_group_id, total in rows}
+            for user_id, (department_id, job_group_id, total) in recorded.items():
+                read = users.get(user_id)
+                users[user_id] = (department_id, job_group_id, max(total, read[2]) if read else total)
+
+            self.clear()
+            for user_id, (department_id, job_group_id, total) in users.items():
+                self.members[user_id] = (department_id, job_group_id)
+                self.global_ranking.totals[user_id] = total
+                self.departments.setdefault(department_id, RankedSet()).totals[user_id] = total
+                self.job_groups.setdefault(job_group_id, RankedSet()).totals[user_id] = total
+
+            # Sort once instead of inserting row by row
+            for ranked in [self.global_ranking, *self.departments.values(), *self.job_groups.values()]:
+                ranked.keys = sorted((-total, user_id) for user_id, total in ranked.totals.items())
+
+leaderboard = Leaderboard()
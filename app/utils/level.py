@@ -0,0 +1,176 @@
+import asyncio
+import bisect
+import threading
+import time
+import numpy as np
+from collections import Counter
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from core.config import get_settings
+
+from db.session import SessionLocal
+from db.schemas import experience_schema
+from db.models import user_model, experience_model
+
+class LevelLadder():
+    """Sorted level thresholds resolved with binary search."""
+
+    def __init__(self, levels: List[experience_schema.Level]):
+        self.levels = sorted(levels, key=lambda level: level.total_required_experience)
+        self.thresholds = [level.total_required_experience for level in self.levels]
+        self.loaded_at = time.monotonic()
+
+    def resolve(self, total_experience: int) -> Optional[experience_schema.Level]:
+        """Return the highest level whose threshold is <= total_experience."""
+        index = bisect.bisect_right(self.thresholds, total_experience) - 1
+        return self.levels[index] if index >= 0 else None
+
+    def next_level(self, total_experience: int) -> Optional[experience_schema.Level]:
+        """Return the first level whose threshold is > total_experience."""
+        index = bisect.bisect_right(self.thresholds, total_experience)
+        return self.levels[index] if index < len(self.levels) else None
+
+    def level_name(self, total_experience: int) -> str:
+        level = self.resolve(total_experience)
+        return level.name if level else "No Level"
+
+    def experience_to_next_level(self, total_experience: int) -> Optional[int]:
+        """Remaining experience until the next level, or None at the top of the ladder."""
+        next_level = self.next_level(total_experience)
+        return next_level.total_required_experience - total_experience if next_level else None
+
+    def progress_percent(self, total_experience: int) -> float:
+        """Progress from the current level to the next one, in percent."""
+        next_level = self.next_level(total_experience)
+        if not next_level:
+            return 100.0
+
+        current_level = self.resolve(total_experience)
+        floor = current_level.total_required_experience if current_level else 0
+        span = next_level.total_required_experience - floor
+        if span <= 0:
+            return 100.0
+
+        return round((total_experience - floor) * 100 / span, 2)
+
+_ladder: Optional[LevelLadder] = None
+
+async def load_ladder(db: AsyncSession) -> LevelLadder:
+    """Load the level ladder from the database and cache it for this process."""
+    global _ladder
+
+    db_levels = (await db.execute(select(experience_model.Level))).scalars().all()
+    _ladder = LevelLadder([experience_schema.Level.model_validate(db_level) for db_level in db_levels])
+    return _ladder
+
+async def get_ladder(db: AsyncSession) -> LevelLadder:
+    """Return the cached ladder, reloading it when missing or older than the TTL.
+
+    The TTL bounds how long other workers keep serving a ladder that was
+    changed through a different process.
+    """
+    ladder = _ladder
+    if ladder is None or time.monotonic() - ladder.loaded_at > get_settings().level_ladder_ttl:
+        ladder = await load_ladder(db)
+    return ladder
+
+def invalidate_ladder():
+    """Drop the cached ladder. Call after any change to the levels table."""
+    global _ladder
+    _ladder = None
+
+# Held while a recomputation runs, so that two of them do not write the same rows
+recompute_lock = threading.Lock()
+
+def recompute_levels(db: Session) -> experience_schema.LevelRecompute:
+    """Re-derive every user's level from the current levels table.
+
+    Totals are mapped onto the thresholds in one vectorized searchsorted
+    call; only changed levels are written, level_recompute_chunk_size rows
+    per transaction so that grants are never held behind one long write.
+    A row is written only if its total is still the one that was read:
+    a user granted experience meanwhile keeps the level the grant resolved
+    with the new ladder. Blocking; run it in a worker thread.
+    """
+    started = time.perf_counter()
+    users = user_model.User.__table__
+
+    db_levels = db.execute(
+        select(experience_model.Level.id, experience_model.Level.name, experience_model.Level.total_required_experience)
+        .order_by(experience_model.Level.total_required_experience, experience_model.Level.id)
+    ).all()
+    rows = db.execute(select(users.c.id, users.c.total_experience, users.c.level_id)).all()
+    db.commit()
+
+    # Ladder positions, with -1 for "no level"; the last of equal thresholds wins, as in LevelLadder.resolve
+    level_ids = np.array([level.id for level in db_levels], dtype=np.int64)
+    thresholds = np.array([level.total_required_experience for level in db_levels], dtype=np.int64)
+    names = {level.id: level.name for level in db_levels}
+    positions = {level_id: position for position, level_id in enumerate(level_ids.tolist())}
+
+    user_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    totals = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    # A level that no longer exists counts as "no level"
+    old_positions = np.fromiter(
+        (positions.get(row[2], -1) if row[2] is not None else -1 for row in rows),
+        dtype=np.int64, count=len(rows)
+    )
+    new_positions = np.searchsorted(thresholds, totals, side="right") - 1
+
+    changed = np.flatnonzero(new_positions != old_positions)
+    if len(level_ids):
+        new_level_ids = np.where(new_positions >= 0, level_ids[np.maximum(new_positions, 0)], -1)
+    else:
+        new_level_ids = np.full(len(rows), -1, dtype=np.int64)
+
+    stmt = (
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"), users.c.total_experience == bindparam("b_total_experience"))
+        .values(level_id=bindparam("b_level_id"))
+    )
+    chunk_size = get_settings().level_recompute_chunk_size
+    written = 0
+    for start in range(0, len(changed), chunk_size):
+        chunk = changed[start:start + chunk_size]
+        result = db.execute(stmt, [
+            {"b_user_id": user_id, "b_total_experience": total, "b_level_id": level_id if level_id >= 0 else None}
+            for user_id, total, level_id in zip(user_ids[chunk].tolist(), totals[chunk].tolist(), new_level_ids[chunk].tolist())
+        ])
+        db.commit()
+        written += result.rowcount
+
+    def level_name(position: int) -> Optional[str]:
+        return names[int(level_ids[position])] if position >= 0 else None
+
+    transitions = Counter(zip(old_positions[changed].tolist(), new_positions[changed].tolist()))
+    moved_up = int(np.count_nonzero(new_positions[changed] > old_positions[changed]))
+
+    return experience_schema.LevelRecompute(
+        users=len(rows),
+        changed=len(changed),
+        moved_up=moved_up,
+        moved_down=len(changed) - moved_up,
+        skipped=len(changed) - written,
+        transitions=[
+            experience_schema.LevelTransition(from_level=level_name(old), to_level=level_name(new), users=count)
+            for (old, new), count in transitions.most_common()
+        ],
+        elapsed_seconds=round(time.perf_counter() - started, 3)
+    )
+
+async def recompute_levels_in_background() -> Optional[experience_schema.LevelRecompute]:
+    """Run recompute_levels in a worker thread with its own session; None if one is already running."""
+    if not recompute_lock.acquire(blocking=False):
+        return None
+
+    def run():
+        with SessionLocal() as db:
+            return recompute_levels(db)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, run)
+    finally:
+        recompute_lock.release()
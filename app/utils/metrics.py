@@ -0,0 +1,135 @@
+import contextvars
+import time
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Optional
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route", "status"]
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served",
+    ["method"]
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "http_request_sql_queries", "SQL statements executed per request",
+    ["method", "route"], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL per request",
+    ["method", "route"], buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+SQL_QUERIES = Counter("sql_queries_total", "SQL statements executed, including background jobs")
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds", "argon2 time in the hash pool, excluding queueing",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+)
+HASH_QUEUE_DEPTH = Gauge("password_hash_queue_depth", "Callers waiting for a hash pool slot")
+HASH_RUNNING = Gauge("password_hash_running", "Hashes running in the hash pool")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Hash requests rejected with 503")
+
+QUEST_BACKLOG = Gauge("quest_backlog", "Committed grants waiting for the quest progress task")
+QUEST_GRANTS_REJECTED = Counter("quest_grants_rejected_total", "Grant requests rejected with 503 while the quest backlog was full")
+QUEST_BATCH_RETRIES = Counter("quest_batch_retries_total", "Quest progress batches retried after failing to commit")
+QUEST_EVENTS_DROPPED = Counter("quest_events_dropped_total", "Grants never folded into quest progress, failing every attempt on shutdown")
+
+NOTIFICATION_CONNECTIONS = Gauge("notification_connections", "Open notification streams")
+NOTIFICATIONS_WRITTEN = Counter("notifications_written_total", "Notifications stored by the batch writer")
+NOTIFICATION_BATCH_RETRIES = Counter("notification_batch_retries_total", "Notification batches retried after failing to commit")
+NOTIFICATIONS_DROPPED = Counter(
+    "notifications_dropped_total",
+    "Notifications dropped: backlog or write (not stored, failing every attempt on shutdown) or slow_client (not pushed)",
+    ["reason"]
+)
+
+class RequestStats():
+    __slots__ = ("queries", "sql_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+# Stats of the request being served; the object is shared with the
+# greenlets SQLAlchemy runs async queries in
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being served, None outside requests (e.g. in background tasks)."""
+    return _request_stats.get()
+
+def instrument_engine(engine: Engine):
+    """Count statements and SQL time of `engine` against the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        SQL_QUERIES.inc()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += time.perf_counter() - context._metrics_started
+
+def route_template(scope) -> str:
+    """Path of the matched route with its parameters put back, e.g. /api/v1/admin/user/user/{employee_id}."""
+    # The route is only known once the router has matched it
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+
+    # route.path_format is relative to the route's router; the router prefixes
+    # before it are static, so they are taken from the request path as is
+    route_segments = [segment for segment in route.path_format.split("/") if segment]
+    path_segments = [segment for segment in scope["path"].split("/") if segment]
+    prefix = path_segments[:max(len(path_segments) - len(route_segments), 0)]
+    return "/" + "/".join(prefix + route_segments)
+
+class MetricsMiddleware():
+    """ASGI middleware recording latency, in-flight requests, status and SQL per route.
+
+    Routes are labelled with their path template (e.g. /api/v1/admin/user/user/{employee_id})
+    so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            _request_stats.reset(token)
+
+            path = route_template(scope)
+            REQUEST_SECONDS.labels(method, path, str(status_code)).observe(elapsed)
+            REQUEST_SQL_QUERIES.labels(method, path).observe(stats.queries)
+            REQUEST_SQL_SECONDS.labels(method, path).observe(stats.sql_seconds)
+
+def metrics_endpoint() -> Response:
+    """Every metric of this process in Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
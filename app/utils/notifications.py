@@ -0,0 +1,231 @@
+import asyncio
+import json
+import time
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Set
+
+from core.config import get_settings
+
+from db.session import AsyncSessionLocal
+from db.schemas import notification_schema
+from db.models import notification_model
+
+from utils import metrics
+
+# Reconnection delay suggested to EventSource clients
+RETRY_MS = 3000
+
+class NotificationEvent(NamedTuple):
+    user_id: int
+    kind: str # experience, level_up, quest_completed
+    amount: Optional[int]
+    total_experience: int
+    level_id: Optional[int]
+    created_at: datetime
+    quest_id: Optional[int] = None
+
+class NotificationBus():
+    """In-process fan-out of notifications to open streams.
+
+    publish() only queues events, so a grant never waits for delivery. The
+    writer task stores queued events in batches (one executemany per batch)
+    and pushes the stored notifications to the streams of their users.
+    Each stream has its own bounded queue: a client that does not keep up
+    loses its oldest undelivered notifications instead of growing memory.
+    Notifications stored by other workers are picked up by sync().
+
+    Ids are not committed in order across workers (PostgreSQL hands them
+    out at insert time), so sync() keeps the ids it skipped below its high
+    water mark as gaps and looks for them again at the next syncs, until
+    they show up or notification_gap_timeout passes (a rolled back write).
+    """
+
+    def __init__(self):
+        self.pending: Optional[asyncio.Queue] = None
+        self.batch: List[NotificationEvent] = [] # taken from pending by the writer and not stored yet
+        self.streams: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self.last_id = 0 # highest notification id seen by sync()
+        self.gaps: Dict[int, float] = {} # ids below last_id not seen yet, with the time they were first missed
+        self.pushed: Set[int] = set() # ids pushed by this worker's writer, not yet seen by sync()
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self.streams.values())
+
+    def publish(self, events: List[NotificationEvent]):
+        """Queue events for the writer; drops them when the backlog is full."""
+        if self.pending is None:
+            return
+
+        for event in events:
+            try:
+                self.pending.put_nowait(event)
+            except asyncio.QueueFull:
+                metrics.NOTIFICATIONS_DROPPED.labels("backlog").inc()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=get_settings().notification_queue_size)
+        self.streams[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self.streams.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.streams[user_id]
+
+    def push(self, notification: notification_schema.Notification, user_id: int):
+        for queue in self.streams.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+                metrics.NOTIFICATIONS_DROPPED.labels("slow_client").inc()
+            queue.put_nowait(notification)
+
+    async def store(self, events: List[NotificationEvent]) -> list:
+        """Store events with one statement. Returns the rows to push to open streams once committed."""
+        table = notification_model.Notification.__table__
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                insert(table).returning(
+                    table.c.id, table.c.user_id, table.c.kind, table.c.amount, table.c.total_experience,
+                    table.c.level_id, table.c.quest_id, table.c.read, table.c.created_at,
+                    sort_by_parameter_order=True
+                ),
+                [{**event._asdict(), "read": False} for event in events]
+            )).all()
+            # Marked before the rows become visible, so sync() cannot push them a second time
+            rows = [row for row in rows if row.user_id in self.streams]
+            ids = {row.id for row in rows}
+            self.pushed.update(ids)
+            try:
+                await db.commit()
+            except Exception:
+                # Rolled back: the ids may be handed out again to other rows
+                self.pushed.difference_update(ids)
+                raise
+        metrics.NOTIFICATIONS_WRITTEN.inc(len(events))
+        return rows
+
+    async def write(self, events: List[NotificationEvent], attempts: Optional[int] = None) -> bool:
+        """Store events and push them to open streams, retrying with exponential backoff while storing fails.
+
+        A failed attempt is rolled back, so it is retried as a whole. Retries
+        until stored, or gives up after `attempts` and returns False.
+        """
+        settings = get_settings()
+        delay = settings.notification_retry_interval
+        attempt = 1
+        while True:
+            try:
+                rows = await self.store(events)
+                break
+            except Exception:
+                print(traceback.format_exc())
+                if attempts is not None and attempt >= attempts:
+                    return False
+            metrics.NOTIFICATION_BATCH_RETRIES.inc()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.notification_retry_max_interval)
+            attempt += 1
+
+        for row in rows:
+            self.push(notification_schema.Notification.model_validate(row), row.user_id)
+        return True
+
+    async def run_writer(self):
+        """Background task: drain the backlog in batches."""
+        settings = get_settings()
+        while True:
+            events = [await self.pending.get()]
+            # Let concurrent grants join the batch
+            await asyncio.sleep(settings.notification_flush_interval)
+            while len(events) < settings.notification_batch_size and not self.pending.empty():
+                events.append(self.pending.get_nowait())
+
+            # Kept until stored, so that flush() still stores it when the task is cancelled while retrying
+            self.batch = events
+            await self.write(events)
+            self.batch = []
+
+    async def flush(self):
+        """Store whatever is still queued (on shutdown)."""
+        settings = get_settings()
+        events, self.batch = self.batch, []
+        while self.pending is not None and not self.pending.empty():
+            events.append(self.pending.get_nowait())
+        for start in range(0, len(events), settings.notification_batch_size):
+            batch = events[start:start + settings.notification_batch_size]
+            if not await self.write(batch, settings.notification_flush_attempts):
+                metrics.NOTIFICATIONS_DROPPED.labels("write").inc(len(batch))
+
+    async def load(self, db: AsyncSession):
+        """Start a fresh backlog and skip notifications stored before startup."""
+        self.pending = asyncio.Queue(maxsize=get_settings().notification_backlog)
+        self.batch = []
+        self.pushed.clear()
+        self.gaps.clear()
+        self.last_id = await db.scalar(select(func.coalesce(func.max(notification_model.Notification.id), 0)))
+
+    async def sync(self, db: AsyncSession):
+        """Push notifications stored by other workers since the last sync."""
+        table = notification_model.Notification.__table__
+        if not self.streams:
+            self.last_id = max(self.last_id, await db.scalar(select(func.coalesce(func.max(table.c.id), 0))))
+            self.pushed.clear()
+            self.gaps.clear()
+            return
+
+        # Ids only (primary key index), to advance the high water mark and track the gaps
+        new = or_(table.c.id > self.last_id, table.c.id.in_(self.gaps.keys())) if self.gaps else table.c.id > self.last_id
+        seen = set((await db.execute(select(table.c.id).where(new))).scalars())
+
+        # Full rows only for the users with a stream open on this worker; a gap
+        # committed between the two reads counts as seen, later ids wait for the next sync
+        rows = (await db.execute(
+            select(table)
+            .where(new, table.c.id <= max(seen), table.c.user_id.in_(self.streams.keys()))
+            .order_by(table.c.id)
+        )).all() if seen else []
+        for row in rows:
+            seen.add(row.id)
+            if row.id not in self.pushed:
+                self.push(notification_schema.Notification.model_validate(row), row.user_id)
+
+        now = time.monotonic()
+        for notification_id in range(self.last_id + 1, max(seen, default=self.last_id)):
+            if notification_id not in seen:
+                self.gaps[notification_id] = now
+        timeout = get_settings().notification_gap_timeout
+        self.gaps = {
+            notification_id: missed_at for notification_id, missed_at in self.gaps.items()
+            if notification_id not in seen and now - missed_at < timeout
+        }
+        self.last_id = max(seen | {self.last_id})
+        self.pushed = {
+            notification_id for notification_id in self.pushed
+            if notification_id > self.last_id or notification_id in self.gaps
+        }
+
+    async def stream(self, user_id: int) -> AsyncIterator[str]:
+        """Server-sent events of a user's new notifications, with keep-alive comments."""
+        queue = self.subscribe(user_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while True:
+                try:
+                    notification = await asyncio.wait_for(queue.get(), get_settings().notification_heartbeat_interval)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                data = json.dumps(notification.model_dump(mode="json"), ensure_ascii=False)
+                yield f"id: {notification.id}\nevent: {notification.kind}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(user_id, queue)
+
+bus = NotificationBus()
+metrics.NOTIFICATION_CONNECTIONS.set_function(lambda: bus.connections)
@@ -0,0 +1,273 @@
+import asyncio
+import traceback
+from collections import defaultdict
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.config import get_settings
+from core.etc import KST
+
+from db.session import AsyncSessionLocal
+from db.schemas import quest_schema
+from db.models import quest_model, user_model
+
+from utils import experience, metrics
+from utils.notifications import NotificationEvent, bus
+from utils.versions import versions
+
+CONDITIONS = ("experience", "grant_count")
+GRANTED_BY = ("admin", "leader")
+
+class QuestEvent(NamedTuple):
+    user_id: int
+    department_id: int
+    job_group_id: int
+    amount: int
+    grant_count: int
+    granted_by: Optional[str]
+    created_at: datetime
+
+class ActiveQuests():
+    """Active quests indexed by target scope and condition type.
+
+    A user is targeted by the quests of the global scope, of their
+    department and of their job group, so the quests an event can advance
+    are three dictionary lookups away.
+    """
+
+    def __init__(self, quests: List[quest_schema.Quest], version: int):
+        self.version = version
+        self.quests = {quest.id: quest for quest in quests}
+        self.index: Dict[Tuple[str, Optional[int]], Dict[str, List[quest_schema.Quest]]] = defaultdict(lambda: defaultdict(list))
+        for quest in quests:
+            if quest.department_id is not None:
+                scope = ("department", quest.department_id)
+            elif quest.job_group_id is not None:
+                scope = ("job_group", quest.job_group_id)
+            else:
+                scope = ("global", None)
+            self.index[scope][quest.condition].append(quest)
+
+    def for_user(self, department_id: int, job_group_id: int, condition: Optional[str] = None) -> List[quest_schema.Quest]:
+        quests = []
+        for scope in (("global", None), ("department", department_id), ("job_group", job_group_id)):
+            by_condition = self.index.get(scope)
+            if not by_condition:
+                continue
+            for quest_condition in ((condition,) if condition else CONDITIONS):
+                for quest in by_condition.get(quest_condition, ()):
+                    # A quest scoped to both a department and a job group needs both to match
+                    if quest.job_group_id is None or quest.job_group_id == job_group_id:
+                        quests.append(quest)
+        return quests
+
+    def advance(self, events: List[QuestEvent]) -> Dict[Tuple[int, int], int]:
+        """Progress made by `events`, as {(user_id, quest_id): increment}."""
+        increments = defaultdict(int)
+        for event in events:
+            for condition in CONDITIONS:
+                for quest in self.for_user(event.department_id, event.job_group_id, condition):
+                    if quest.granted_by is not None and quest.granted_by != event.granted_by:
+                        continue
+                    if (quest.start_at and event.created_at < quest.start_at) or (quest.end_at and event.created_at >= quest.end_at):
+                        continue
+                    increments[(event.user_id, quest.id)] += event.amount if condition == "experience" else event.grant_count
+        return increments
+
+class QuestEngine():
+    """Advances quest progress from the experience-grant event stream.
+
+    Grants are queued once they commit. A background task folds a batch of
+    them into per-(user, quest) increments using the active-quest index,
+    upserts the progress rows with one statement, claims the completions
+    with a second one and awards the rewards as one batch grant. The
+    experience table is never rescanned, so a committed grant is never
+    dropped: when quest_backlog grants are waiting, new grant requests are
+    rejected with 503 before they write anything (see `admit`). Quest
+    rewards do not advance quests.
+    """
+
+    def __init__(self):
+        self.pending: Optional[asyncio.Queue] = None
+        self.batch: List[QuestEvent] = [] # taken from pending by run() and not processed yet
+        self.active: Optional[ActiveQuests] = None
+
+    def publish(self, results: List[experience.GrantedExperience], granted_by: Optional[str]):
+        """Grant listener: queue committed grants for the next batch."""
+        if self.pending is None or granted_by == "quest":
+            return
+
+        # Unbounded: admission is limited by `admit` before the grant commits
+        now = experience.to_kst(datetime.now(KST))
+        for result in results:
+            self.pending.put_nowait(QuestEvent(
+                result.user_id, result.department_id, result.job_group_id,
+                result.amount, result.grant_count, granted_by, now
+            ))
+
+    @property
+    def backlog(self) -> int:
+        return self.pending.qsize() + len(self.batch) if self.pending is not None else 0
+
+    def admit(self):
+        """Reject a grant request with 503 while quest_backlog grants are waiting. Call before granting."""
+        if self.backlog < get_settings().quest_backlog:
+            return
+
+        metrics.QUEST_GRANTS_REJECTED.inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again later",
+            headers={"Retry-After": "1"}
+        )
+
+    async def load(self, db: AsyncSession):
+        """Start a fresh backlog and load the active quests."""
+        self.pending = asyncio.Queue()
+        self.batch = []
+        await self.load_quests(db)
+
+    async def load_quests(self, db: AsyncSession) -> ActiveQuests:
+        """Load the active quests that have not ended yet."""
+        version = versions.get("quests")
+        now = experience.to_kst(datetime.now(KST))
+        db_quests = (await db.execute(
+            select(quest_model.Quest)
+            .where(quest_model.Quest.is_active.is_(True), or_(quest_model.Quest.end_at.is_(None), quest_model.Quest.end_at > now))
+        )).scalars().all()
+        self.active = ActiveQuests([quest_schema.Quest.model_validate(db_quest) for db_quest in db_quests], version)
+        return self.active
+
+    async def get_active(self, db: AsyncSession) -> ActiveQuests:
+        """Return the active quests, reloading them when the quests version moved."""
+        active = self.active
+        if active is None or active.version != versions.get("quests"):
+            active = await self.load_quests(db)
+        return active
+
+    async def store(self, events: List[QuestEvent]) -> Tuple[ActiveQuests, list, List[experience.GrantedExperience], Dict[int, int]]:
+        """Fold events into progress and award completed quests in one transaction.
+        Returns the quests, the completions, the grants and the completing users'
+        total experience, to announce once committed."""
+        async with AsyncSessionLocal() as db:
+            active = await self.get_active(db)
+            increments = active.advance(events)
+            if not increments:
+                return active, [], [], {}
+
+            # Add the increments; completed quests stop counting
+            table = quest_model.QuestProgress.__table__
+            dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+            stmt = dialect.insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.quest_id],
+                set_={"progress": table.c.progress + stmt.excluded.progress},
+                where=table.c.completed_at.is_(None)
+            ).returning(table.c.user_id, table.c.quest_id, table.c.progress)
+            rows = (await db.execute(stmt, [
+                {"user_id": user_id, "quest_id": quest_id, "progress": increment}
+                for (user_id, quest_id), increment in increments.items()
+            ])).all()
+
+            reached = [(user_id, quest_id) for user_id, quest_id, progress in rows if progress >= active.quests[quest_id].target]
+            completed, granted, totals = [], [], {}
+            if reached:
+                # Claim the completions; a quest completed concurrently by another worker is not claimed twice
+                now = experience.to_kst(datetime.now(KST))
+                completed = (await db.execute(
+                    update(table)
+                    .where(tuple_(table.c.user_id, table.c.quest_id).in_(reached), table.c.completed_at.is_(None))
+                    .values(completed_at=now)
+                    .returning(table.c.user_id, table.c.quest_id)
+                )).all()
+
+                rewards = [(user_id, active.quests[quest_id].reward) for user_id, quest_id in completed if active.quests[quest_id].reward > 0]
+                granted = await experience.add_experiences(db, rewards)
+
+                # Users completing only unrewarded quests get no grant result; read their total in the same transaction
+                totals = {result.user_id: result.total_experience for result in granted}
+                unrewarded = {user_id for user_id, quest_id in completed if user_id not in totals}
+                if unrewarded:
+                    totals.update((await db.execute(
+                        select(user_model.User.id, user_model.User.total_experience).where(user_model.User.id.in_(unrewarded))
+                    )).all())
+
+            await db.commit()
+        return active, completed, granted, totals
+
+    def announce(self, active: ActiveQuests, completed: list, granted: List[experience.GrantedExperience], totals: Dict[int, int]):
+        """Publish the grants and completion notifications of a committed batch."""
+        experience.publish_grants(granted, "quest")
+
+        if completed:
+            rewarded = {result.user_id: result for result in granted}
+            now = datetime.now(KST)
+            bus.publish([
+                NotificationEvent(
+                    user_id, "quest_completed", active.quests[quest_id].reward,
+                    totals.get(user_id, 0),
+                    rewarded[user_id].level_id if user_id in rewarded else None,
+                    now, quest_id
+                )
+                for user_id, quest_id in completed
+            ])
+
+    async def process(self, events: List[QuestEvent], attempts: Optional[int] = None) -> bool:
+        """Store and announce a batch, retrying with exponential backoff while storing fails.
+
+        A failed attempt is rolled back, so it is retried as a whole;
+        announcing only happens once the batch is committed. Retries until
+        stored, or gives up after `attempts` and returns False.
+        """
+        settings = get_settings()
+        delay = settings.quest_retry_interval
+        attempt = 1
+        while True:
+            try:
+                stored = await self.store(events)
+                break
+            except Exception:
+                print(traceback.format_exc())
+                if attempts is not None and attempt >= attempts:
+                    return False
+            metrics.QUEST_BATCH_RETRIES.inc()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, settings.quest_retry_max_interval)
+            attempt += 1
+
+        self.announce(*stored)
+        return True
+
+    async def run(self):
+        """Background task: process the backlog in batches."""
+        settings = get_settings()
+        while True:
+            events = [await self.pending.get()]
+            # Let concurrent grants join the batch
+            await asyncio.sleep(settings.quest_flush_interval)
+            while len(events) < settings.quest_batch_size and not self.pending.empty():
+                events.append(self.pending.get_nowait())
+
+            # Kept until processed, so that flush() still processes it when the task is cancelled while retrying
+            self.batch = events
+            await self.process(events)
+            self.batch = []
+
+    async def flush(self):
+        """Process whatever is still queued (on shutdown)."""
+        settings = get_settings()
+        events, self.batch = self.batch, []
+        while self.pending is not None and not self.pending.empty():
+            events.append(self.pending.get_nowait())
+        for start in range(0, len(events), settings.quest_batch_size):
+            batch = events[start:start + settings.quest_batch_size]
+            if not await self.process(batch, settings.quest_flush_attempts):
+                metrics.QUEST_EVENTS_DROPPED.inc(len(batch))
+
+engine = QuestEngine()
+experience.grant_listeners.append(engine.publish)
+metrics.QUEST_BACKLOG.set_function(lambda: engine.backlog)
@@ -0,0 +1,101 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from db.models import user_model
+
+from utils.versions import versions
+
+class ReferenceEntry(NamedTuple):
+    id: int
+    name: str
+    is_active: bool
+
+class ReferenceTable():
+    """One small lookup table indexed both by id and by name."""
+
+    def __init__(self, entries):
+        self.by_id: Dict[int, ReferenceEntry] = {entry.id: entry for entry in entries}
+        self.by_name: Dict[str, ReferenceEntry] = {entry.name: entry for entry in entries}
+
+    def id_of(self, name: str) -> Optional[int]:
+        entry = self.by_name.get(name)
+        return entry.id if entry else None
+
+    def name_of(self, id: int) -> Optional[str]:
+        entry = self.by_id.get(id)
+        return entry.name if entry else None
+
+    def ids(self) -> Dict[str, int]:
+        """name -> id of every entry."""
+        return {name: entry.id for name, entry in self.by_name.items()}
+
+class ReferenceRegistry():
+    """Departments and job groups of this process, tagged with the versions they were loaded at."""
+
+    def __init__(self, departments: ReferenceTable, job_groups: ReferenceTable, loaded_versions: Tuple[int, int]):
+        self.departments = departments
+        self.job_groups = job_groups
+        self.loaded_versions = loaded_versions
+
+    def is_current(self) -> bool:
+        return self.loaded_versions == current_versions()
+
+    def resolve_names(self, department_name: str, job_group_name: str) -> Tuple[Optional[int], Optional[int]]:
+        return self.departments.id_of(department_name), self.job_groups.id_of(job_group_name)
+
+    def names(self, department_id: int, job_group_id: int) -> Tuple[Optional[str], Optional[str]]:
+        return self.departments.name_of(department_id), self.job_groups.name_of(job_group_id)
+
+_registry: Optional[ReferenceRegistry] = None
+
+def current_versions() -> Tuple[int, int]:
+    return versions.get("departments"), versions.get("job_groups")
+
+async def load_registry(db: AsyncSession) -> ReferenceRegistry:
+    """Load departments and job groups from the database and cache them for this process."""
+    global _registry
+
+    # Read the versions first, so a write during the load triggers another one
+    loaded_versions = current_versions()
+    departments = ReferenceTable([
+        ReferenceEntry(*row) for row in (await db.execute(select(
+            user_model.Department.id, user_model.Department.name, user_model.Department.is_active
+        ))).all()
+    ])
+    job_groups = ReferenceTable([
+        ReferenceEntry(*row) for row in (await db.execute(select(
+            user_model.JobGroup.id, user_model.JobGroup.name, user_model.JobGroup.is_active
+        ))).all()
+    ])
+
+    _registry = ReferenceRegistry(departments, job_groups, loaded_versions)
+    return _registry
+
+async def get_registry(db: AsyncSession) -> ReferenceRegistry:
+    """Return the cached registry, reloading it when its versions are behind.
+
+    The check compares in-memory counters only; `versions` keeps them in step
+    with the other workers.
+    """
+    registry = _registry
+    if registry is None or not registry.is_current():
+        registry = await load_registry(db)
+    return registry
+
+async def resolve_names(db: AsyncSession, department_name: str, job_group_name: str) -> Tuple[Optional[int], Optional[int]]:
+    """(department id, job group id) for the names, reloading once on a miss.
+
+    A miss may be a row created by another worker since the last version sync.
+    """
+    department_id, job_group_id = (await get_registry(db)).resolve_names(department_name, job_group_name)
+    if department_id is None or job_group_id is None:
+        department_id, job_group_id = (await load_registry(db)).resolve_names(department_name, job_group_name)
+    return department_id, job_group_id
+
+async def names(db: AsyncSession, department_id: int, job_group_id: int) -> Tuple[Optional[str], Optional[str]]:
+    """(department name, job group name) for the ids, reloading once on a miss."""
+    department_name, job_group_name = (await get_registry(db)).names(department_id, job_group_id)
+    if department_name is None or job_group_name is None:
+        department_name, job_group_name = (await load_registry(db)).names(department_id, job_group_id)
+    return department_name, job_group_name
@@ -0,0 +1,192 @@
+import re
+from sqlalchemy import DDL, case, column, event, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from db.models import user_model, board_model
+
+# Full-text indexes (SQLite FTS5) of users and board posts.
+#
+# Each index is an FTS5 table whose rowid is the id of the indexed row,
+# kept in sync by triggers, so every write path (the API, imports,
+# benchmarks.generate, manual SQL) updates it. Terms match the start of
+# words; prefix indexes on 1-3 characters keep short type-ahead prefixes
+# fast. Every match is ranked (bm25) and the best `limit` are kept, so the
+# cost grows with the number of matches of a query. Other databases fall
+# back to an unindexed LIKE search.
+
+USERS_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        employee_id, username, name, department, job_group,
+        prefix='1 2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, employee_id, username, name, department, job_group) VALUES (
+            new.id, new.employee_id, new.username, new.name,
+            (SELECT name FROM departments WHERE id = new.department_id),
+            (SELECT name FROM job_group WHERE id = new.job_group_id)
+        );
+    END""",
+    # Experience grants update users too; only the indexed columns fire this one
+    """CREATE TRIGGER IF NOT EXISTS users_fts_update
+    AFTER UPDATE OF employee_id, username, name, department_id, job_group_id ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+        INSERT INTO users_fts(rowid, employee_id, username, name, department, job_group) VALUES (
+            new.id, new.employee_id, new.username, new.name,
+            (SELECT name FROM departments WHERE id = new.department_id),
+            (SELECT name FROM job_group WHERE id = new.job_group_id)
+        );
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_department AFTER UPDATE OF name ON departments BEGIN
+        UPDATE users_fts SET department = new.name WHERE rowid IN (SELECT id FROM users WHERE department_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_job_group AFTER UPDATE OF name ON job_group BEGIN
+        UPDATE users_fts SET job_group = new.name WHERE rowid IN (SELECT id FROM users WHERE job_group_id = new.id);
+    END""",
+]
+
+USERS_FTS_REBUILD = [
+    "DELETE FROM users_fts",
+    """INSERT INTO users_fts(rowid, employee_id, username, name, department, job_group)
+    SELECT users.id, users.employee_id, users.username, users.name, departments.name, job_group.name
+    FROM users
+    LEFT JOIN departments ON departments.id = users.department_id
+    LEFT JOIN job_group ON job_group.id = users.job_group_id""",
+]
+
+POSTS_FTS_DDL = [
+    # department_id is indexed so that the board filter runs inside the index
+    """CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content, department_id,
+        content='posts', content_rowid='id', prefix='1 2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content, department_id) VALUES (new.id, new.title, new.content, new.department_id);
+    END""",
+    # Like and comment counters update posts too; only the indexed columns fire this one
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content, department_id ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content, department_id)
+        VALUES ('delete', old.id, old.title, old.content, old.department_id);
+        INSERT INTO posts_fts(rowid, title, content, department_id) VALUES (new.id, new.title, new.content, new.department_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content, department_id)
+        VALUES ('delete', old.id, old.title, old.content, old.department_id);
+    END""",
+]
+
+POSTS_FTS_REBUILD = ["INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"]
+
+# Column weights for bm25(), in column order: exact identifiers rank above names and teams
+USERS_FTS_WEIGHTS = (10.0, 5.0, 5.0, 1.0, 1.0)
+POSTS_FTS_WEIGHTS = (3.0, 1.0, 0.0)
+
+def _sqlite_ddl(statements):
+    return [DDL(statement).execute_if(dialect="sqlite") for statement in statements]
+
+# Created together with their tables (create_all) and dropped before them (drop_all)
+for statement in _sqlite_ddl(USERS_FTS_DDL):
+    event.listen(user_model.User.__table__, "after_create", statement)
+event.listen(user_model.User.__table__, "before_drop", DDL("DROP TABLE IF EXISTS users_fts").execute_if(dialect="sqlite"))
+for statement in _sqlite_ddl(POSTS_FTS_DDL):
+    event.listen(board_model.Post.__table__, "after_create", statement)
+event.listen(board_model.Post.__table__, "before_drop", DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite"))
+
+def ensure_search_indexes(engine: Engine):
+    """Create missing indexes on databases whose tables predate them, filling them from the tables."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").scalars())
+        for name, ddl, rebuild in (
+            ("users_fts", USERS_FTS_DDL, USERS_FTS_REBUILD),
+            ("posts_fts", POSTS_FTS_DDL, POSTS_FTS_REBUILD),
+        ):
+            if name in existing:
+                continue
+            for statement in ddl + rebuild:
+                conn.exec_driver_sql(statement)
+
+def rebuild_search_indexes(db: Session) -> bool:
+    """Create the indexes if needed and refill them from the tables. False on databases without FTS5 indexes."""
+    if db.bind.dialect.name != "sqlite":
+        return False
+
+    for statement in USERS_FTS_DDL + POSTS_FTS_DDL + USERS_FTS_REBUILD + POSTS_FTS_REBUILD:
+        db.execute(text(statement))
+    return True
+
+def match_query(q: str) -> str:
+    """FTS5 query matching rows that contain a word starting with each term of `q`."""
+    terms = re.findall(r"\w+", q)
+    return " ".join('"' + term + '"*' for term in terms)
+
+def ranked_matches(name: str, weights, match: str, limit: int) -> Select:
+    """rowid and bm25 rank of the `limit` rows of the index `name` matching `match` best."""
+    fts = table(name, column("rowid"))
+    weights = ", ".join(str(weight) for weight in weights)
+    rank = literal_column(f"bm25({name}, {weights})").label("rank")
+    return (
+        select(fts.c.rowid.label("id"), rank)
+        .where(text(f"{name} MATCH :match").bindparams(match=match))
+        .order_by(rank, fts.c.rowid)
+        .limit(limit)
+    )
+
+def like_escape(term: str) -> str:
+    """`term` with the LIKE wildcard it may contain (\\w includes "_") escaped by a backslash."""
+    return term.replace("\\", "\\\\").replace("_", "\\_")
+
+def search_users(dialect: str, q: str, limit: int) -> Select:
+    """Ids of the `limit` users matching `q` best with their tier and rank, lower is better.
+    Join it and order by tier, then rank.
+
+    Tier 0 holds the users whose employee id, username or name is exactly
+    `q`, which a prefix query cannot tell from longer words.
+    """
+    users = user_model.User
+    exact = q.strip()
+    tier = case((or_(users.employee_id == exact, users.username == exact, users.name == exact), 0), else_=1).label("tier")
+    if dialect == "sqlite":
+        ranked = ranked_matches("users_fts", USERS_FTS_WEIGHTS, match_query(q), limit)
+        fts_id = ranked.selected_columns.id
+        return (
+            ranked.add_columns(tier)
+            .join(users.__table__, users.id == fts_id)
+            .order_by(None)
+            .order_by(tier, ranked.selected_columns.rank, fts_id)
+        )
+
+    # Unindexed fallback: every term must prefix one of the columns, shorter names first
+    conditions = []
+    for term in re.findall(r"\w+", q):
+        pattern = like_escape(term) + "%"
+        conditions.append(or_(
+            users.employee_id.ilike(pattern, escape="\\"), users.username.ilike(pattern, escape="\\"),
+            users.name.ilike(pattern, escape="\\"),
+            users.department.has(user_model.Department.name.ilike(pattern, escape="\\")),
+            users.job_group.has(user_model.JobGroup.name.ilike(pattern, escape="\\"))
+        ))
+    rank = func.length(users.name).label("rank")
+    return select(users.id, tier, rank).where(*conditions).order_by(tier, rank, users.id).limit(limit)
+
+def search_posts(dialect: str, q: str, department_id: int, limit: int) -> Select:
+    """Ids of the `limit` posts of a department board matching `q` best with their rank, lower is better.
+    Join it and order by rank."""
+    posts = board_model.Post
+    if dialect == "sqlite":
+        match = f'department_id : "{int(department_id)}" AND {{title content}} : ({match_query(q)})'
+        return ranked_matches("posts_fts", POSTS_FTS_WEIGHTS, match, limit)
+
+    # Unindexed fallback: every term must appear in the title or the content, newest first
+    conditions = []
+    for term in re.findall(r"\w+", q):
+        pattern = "%" + like_escape(term) + "%"
+        conditions.append(or_(posts.title.ilike(pattern, escape="\\"), posts.content.ilike(pattern, escape="\\")))
+    rank = (-posts.id).label("rank")
+    return select(posts.id, rank).where(posts.department_id == department_id, *conditions).order_by(rank).limit(limit)
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+from sqlalchemy import select
+from typing import AsyncIterator, List
+
+from db.session import AsyncSessionLocal
+from db.models import user_model, experience_model
+
+from utils import level
+
+COLUMNS = [
+    "employee_id",
+    "username",
+    "name",
+    "join_date",
+    "department_name",
+    "job_group_name",
+    "permission",
+    "total_experience",
+    "level",
+    "experience_to_next_level",
+]
+
+def export_query():
+    """One row per user with department, job group, total experience and level names."""
+    return (
+        select(
+            user_model.User.employee_id,
+            user_model.User.username,
+            user_model.User.name,
+            user_model.User.join_date,
+            user_model.Department.name,
+            user_model.JobGroup.name,
+            user_model.User.permission_type,
+            user_model.User.total_experience,
+            experience_model.Level.name,
+        )
+        .join(user_model.Department, user_model.User.department_id == user_model.Department.id)
+        .join(user_model.JobGroup, user_model.User.job_group_id == user_model.JobGroup.id)
+        .outerjoin(experience_model.Level, user_model.User.level_id == experience_model.Level.id)
+        .order_by(user_model.User.id)
+    )
+
+def format_rows(rows: List[list], file_format: str) -> str:
+    if file_format == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+    return "".join(
+        json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False, default=str) + "\n"
+        for row in rows
+    )
+
+async def export_users(file_format: str, chunk_size: int) -> AsyncIterator[str]:
+    """Stream every user as CSV or NDJSON.
+
+    Rows come from a server-side cursor `chunk_size` at a time and each chunk
+    is written out as one piece, so memory stays flat however many users
+    there are.
+    """
+    if file_format == "csv":
+        yield format_rows([COLUMNS], file_format)
+
+    async with AsyncSessionLocal() as db:
+        ladder = await level.get_ladder(db)
+
+        result = await db.stream(export_query().execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            rows = []
+            for employee_id, username, name, join_date, department_name, job_group_name, permission, total_exp, level_name in partition:
+                rows.append([
+                    employee_id,
+                    username,
+                    name,
+                    join_date.isoformat(),
+                    department_name,
+                    job_group_name,
+                    permission.name.lower(),
+                    total_exp,
+                    level_name or "No Level",
+                    ladder.experience_to_next_level(total_exp),
+                ])
+            yield format_rows(rows, file_format)
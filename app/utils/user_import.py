@@ -0,0 +1,147 @@
+import asyncio
+import codecs
+import csv
+import json
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from typing import AsyncIterator, BinaryIO, Dict, Iterator, List, Tuple
+
+from core.etc import Permission
+
+from db.session import AsyncSessionLocal
+from db.schemas import user_schema
+from db.models import user_model
+
+from utils import hash, level
+
+def read_rows(file: BinaryIO, file_format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, row) from a CSV or JSONL file without reading it all into memory."""
+    lines = codecs.getreader("utf-8-sig")(file)
+
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+
+def event(name: str, **data) -> str:
+    return json.dumps({"event": name, **data}, ensure_ascii=False, default=str) + "\n"
+
+async def import_users(
+    file: BinaryIO,
+    file_format: str,
+    departments: Dict[str, int],
+    job_groups: Dict[str, int],
+    chunk_size: int
+) -> AsyncIterator[str]:
+    """Import users from an uploaded file, yielding NDJSON progress and error events.
+
+    Rows are validated, password-hashed through the shared hash pool (so the
+    argon2 memory budget is respected) and inserted one chunk per transaction.
+    A failed row is reported and skipped; it never aborts the import.
+    """
+    processed = created = failed = 0
+    seen = set() # employee_id and username already in the file
+    chunk: List[Tuple[int, user_schema.UserCreate]] = []
+
+    async with AsyncSessionLocal() as db:
+        db_level = (await level.get_ladder(db)).resolve(0)
+
+        async def flush():
+            nonlocal created, failed
+
+            # Skip users that already exist, with one query per chunk
+            employee_ids = [row.employee_id for _, row in chunk]
+            usernames = [row.username for _, row in chunk]
+            existing = set()
+            for employee_id, username in (await db.execute(
+                select(user_model.User.employee_id, user_model.User.username)
+                .where(or_(user_model.User.employee_id.in_(employee_ids), user_model.User.username.in_(usernames)))
+            )).all():
+                existing.update((employee_id, username))
+
+            rows = []
+            for line_number, row in chunk:
+                if row.employee_id in existing or row.username in existing:
+                    failed += 1
+                    yield event("error", line=line_number, employee_id=row.employee_id,
+                                detail="The user with this employee_id or username already exists")
+                else:
+                    rows.append(row)
+
+            # Hash passwords in parallel, never queueing more than the pool can run
+            slots = asyncio.Semaphore(hash.pool.max_workers)
+            async def hash_password(password: str) -> str:
+                async with slots:
+                    return await hash.pool.run(hash.hash_text, password, queue_timeout=0)
+
+            hashed_passwords = await asyncio.gather(*(hash_password(row.password) for row in rows))
+
+            if rows:
+                try:
+                    await db.execute(insert(user_model.User), [
+                        {
+                            "employee_id": row.employee_id,
+                            "username": row.username,
+                            "name": row.name,
+                            "hashed_password": hashed_password,
+                            "join_date": row.join_date,
+                            "department_id": departments[row.department_name],
+                            "job_group_id": job_groups[row.job_group_name],
+                            "permission_type": Permission.LEADER if (row.permission or "").lower() == "leader" else Permission.USER,
+                            "total_experience": 0,
+                            "level_id": db_level.id if db_level else None,
+                        }
+                        for row, hashed_password in zip(rows, hashed_passwords)
+                    ])
+                    await db.commit()
+                    created += len(rows)
+                except SQLAlchemyError:
+                    # e.g. a user created concurrently; report the whole chunk and go on
+                    await db.rollback()
+                    failed += len(rows)
+                    for row in rows:
+                        yield event("error", employee_id=row.employee_id, detail="Database error occurred")
+
+            chunk.clear()
+
+        for line_number, raw in read_rows(file, file_format):
+            processed += 1
+
+            # Validate the row
+            try:
+                if raw is None:
+                    raise ValueError("Invalid row")
+                row = user_schema.UserCreate.model_validate(raw)
+                if row.department_name not in departments or row.job_group_name not in job_groups:
+                    raise ValueError("Department or Job group not found")
+                if row.employee_id in seen or row.username in seen:
+                    raise ValueError("Duplicate employee_id or username in the file")
+            except (ValidationError, ValueError) as e:
+                failed += 1
+                detail = "Invalid row" if isinstance(e, ValidationError) else str(e)
+                yield event("error", line=line_number, employee_id=(raw or {}).get("employee_id"), detail=detail)
+                continue
+
+            seen.update((row.employee_id, row.username))
+            chunk.append((line_number, row))
+
+            if len(chunk) >= chunk_size:
+                async for message in flush():
+                    yield message
+                yield event("progress", processed=processed, created=created, failed=failed)
+
+        if chunk:
+            async for message in flush():
+                yield message
+
+    yield event("done", processed=processed, created=created, failed=failed)
@@ -1,6 +1,22 @@
 import re
+import json
+import base64
+from typing import Any, List, Optional
 
 def is_valid_email(email: str):
     email_pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
     return re.match(email_pattern, email) is not None
 
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the keyset of the last row on a page into an opaque cursor."""
+    raw = json.dumps(values, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Optional[List[Any]]:
+    """Decode a cursor made by encode_cursor. Return None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        return None
+    return values if isinstance(values, list) else None
@@ -0,0 +1,86 @@
+import hashlib
+import threading
+from fastapi import Request, Response, status
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, Optional
+
+from db.models import version_model
+
+from utils import level
+
+CACHE_CONTROL = "private, no-cache"
+
+class ResourceVersions():
+    """Version counters of rarely changing resources, used to build ETags.
+
+    The counters live in the resource_versions table so every worker agrees
+    on them. Each worker keeps a copy in memory, refreshed by `sync()` and
+    updated when its own writes commit, so a conditional request is answered
+    without touching the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.versions: Dict[str, int] = {}
+
+    def get(self, name: str) -> int:
+        return self.versions.get(name, 0)
+
+    def set(self, name: str, version: int):
+        with self.lock:
+            # Never go back, a sync may race with a local commit
+            if version > self.versions.get(name, 0):
+                self.versions[name] = version
+                if name == "levels":
+                    level.invalidate_ladder()
+
+    async def bump(self, db: AsyncSession, name: str) -> int:
+        """Increment a version in the caller's transaction; the local copy follows on commit."""
+        table = version_model.ResourceVersion.__table__
+        dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+
+        stmt = dialect.insert(table).values(name=name, version=1)
+        version = await db.scalar(stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={"version": table.c.version + 1}
+        ).returning(table.c.version))
+        db.sync_session.info.setdefault("bumped_versions", {})[name] = version
+        return version
+
+    async def sync(self, db: AsyncSession):
+        """Pick up versions bumped by other workers."""
+        for name, version in (await db.execute(select(
+            version_model.ResourceVersion.name,
+            version_model.ResourceVersion.version
+        ))).all():
+            self.set(name, version)
+
+versions = ResourceVersions()
+
+@event.listens_for(Session, "after_commit")
+def publish_versions(session: Session):
+    for name, version in session.info.pop("bumped_versions", {}).items():
+        versions.set(name, version)
+
+@event.listens_for(Session, "after_rollback")
+def discard_versions(session: Session):
+    session.info.pop("bumped_versions", None)
+
+def etag(*parts) -> str:
+    """Strong ETag from the values a response depends on."""
+    return '"' + hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()[:20] + '"'
+
+def not_modified(request: Request, response: Response, tag: str) -> Optional[Response]:
+    """Set the validator headers, and return a 304 response when the client already has `tag`."""
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+        if tag in candidates or "*" in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return None